@@ -7,30 +7,42 @@ https://github.com/JohNan/flichub
 import async_timeout
 import asyncio
 import logging
-from typing import Any
-from dataclasses import dataclass
+import time
+from typing import Any, Callable
+from dataclasses import dataclass, field
 from datetime import timedelta
 from homeassistant.helpers.issue_registry import async_create_issue, IssueSeverity
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_IP_ADDRESS, CONF_PORT, EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Context, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC, format_mac
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from pyflichub.button import FlicButton
-from pyflichub.client import FlicHubTcpClient, ServerCommand
+from pyflichub.client import ServerCommand
 from pyflichub.command import Command
 from pyflichub.event import Event
 from .const import CLIENT_READY_TIMEOUT, EVENT_CLICK, EVENT_DATA_NAME, EVENT_DATA_CLICK_TYPE, \
-    EVENT_DATA_SERIAL_NUMBER, DATA_BUTTONS, DATA_HUB, REQUIRED_SERVER_VERSION, DEFAULT_SCAN_INTERVAL, \
+    EVENT_DATA_SERIAL_NUMBER, DATA_BUTTONS, DATA_HUB, REQUIRED_SERVER_VERSION, \
     EVENT_ACTION_MESSAGE, EVENT_VIRTUAL_DEVICE_UPDATE, EVENT_DATA_ACTION, \
-    EVENT_DATA_META_DATA, EVENT_DATA_VALUES, EVENT_DATA_BUTTON_NUMBER, DATA_VIRTUAL_DEVICES
+    EVENT_DATA_META_DATA, EVENT_DATA_VALUES, EVENT_DATA_BUTTON_NUMBER, DATA_VIRTUAL_DEVICES, \
+    CONF_MAX_UPDATE_RATE, DEFAULT_MAX_UPDATE_RATE, CONF_DEADBAND_ENTER, CONF_DEADBAND_EXIT
 from .const import DOMAIN
 from .const import PLATFORMS
+from .client import FlicHubClient, describe_error
+from .coordinator import FlicHubDataUpdateCoordinator
+from .device_trigger import async_fire_device_triggers
+from .manager import FlicHubManager
+from .profiler import outside_profile, profiled
+from .sender import FlicHubVirtualDeviceSender
+from .services import async_setup_services
+from .store import FlicHubStore
 
 SCAN_INTERVAL = timedelta(seconds=30)
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -39,46 +51,95 @@ _LOGGER: logging.Logger = logging.getLogger(__package__)
 class FlicHubEntryData:
     """Class for sharing data within the Nanoleaf integration."""
 
-    client: FlicHubTcpClient
-    coordinator: DataUpdateCoordinator[dict]
+    client: FlicHubClient
+    coordinator: FlicHubDataUpdateCoordinator
+    store: FlicHubStore
+    sender: FlicHubVirtualDeviceSender
     unsub_update_listener: Any = None
+    platforms: list[str] = field(default_factory=list)
+    options: dict = field(default_factory=dict)
+    address: tuple = ()
+    platform_unsubs: dict[str, list[Callable]] = field(default_factory=dict)
+
+    @callback
+    def async_on_platform_unload(self, platform: str, func: Callable) -> None:
+        """Call ``func`` when ``platform`` is unloaded, not when any platform of the entry is."""
+        self.platform_unsubs.setdefault(platform, []).append(func)
+
+    @callback
+    def async_unload_platform(self, platform: str) -> None:
+        for func in self.platform_unsubs.pop(platform, []):
+            func()
+
+
+def enabled_platforms(entry: ConfigEntry) -> list[str]:
+    """Return the platforms enabled in the options of an entry."""
+    return [platform for platform in PLATFORMS if entry.options.get(str(platform), True)]
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Set up the hub manager and the services shared by all hubs."""
+    manager = FlicHubManager(hass)
+    await manager.ir_library.async_load()
+    hass.data[DOMAIN] = manager
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, manager.async_stop)
+    async_setup_services(hass, manager)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up this integration using UI."""
-    if hass.data.get(DOMAIN) is None:
-        hass.data.setdefault(DOMAIN, {})
-
-    def update_device_registry_names(buttons):
-        device_registry = dr.async_get(hass)
-        for button in buttons:
-            device = device_registry.async_get_device(identifiers={(DOMAIN, button.serial_number)})
-            if device and device.name != button.name:
-                device_registry.async_update_device(device.id, name=button.name)
-
+    manager: FlicHubManager = hass.data[DOMAIN]
+
+    def update_button_state(event: Event):
+        """Patch the connection flags of a button from the event payload."""
+        button = coordinator.async_get_button(event.button)
+        if button is None:
+            # Unknown button, let the (debounced) refresh pick it up
+            hass.async_create_task(coordinator.async_request_refresh())
+            return
+        if event.event == "buttonConnected":
+            button.connected = True
+        elif event.event == "buttonDisconnected":
+            button.connected = False
+        elif event.event == "buttonReady":
+            button.ready = True
+        coordinator.async_update_listeners()
+
+    @profiled
     def on_event(button: FlicButton, event: Event):
         _LOGGER.debug(f"Event: {event}")
+        start = time.perf_counter()
+        coordinator.metrics.record_event(event.event)
+        coordinator.async_push_received()
         if event.event == "button":
-            hass.bus.fire(EVENT_CLICK, {
+            event_data = {
                 EVENT_DATA_SERIAL_NUMBER: button.serial_number,
                 EVENT_DATA_NAME: button.name,
                 EVENT_DATA_CLICK_TYPE: event.action,
                 EVENT_DATA_BUTTON_NUMBER: event.button_number
-            })
+            }
+            context = Context()
+            with outside_profile():
+                hass.bus.async_fire(EVENT_CLICK, event_data, context=context)
+                async_fire_device_triggers(hass, event_data, context)
+            # Deliver the click straight to the entity of this button only
+            async_dispatcher_send(hass, f"{DOMAIN}_{entry.entry_id}_click_{button.serial_number}", event_data)
+            # The entity writes its state while the signal is sent
+            coordinator.metrics.click_latency.record((time.perf_counter() - start) * 1000)
         if event.event == "buttonDeleted":
             device_registry = dr.async_get(hass)
             device = device_registry.async_get_device(identifiers={(DOMAIN, event.button)})
             if device:
                 device_registry.async_remove_device(device.id)
-            hass.async_create_task(coordinator.async_refresh())
+            hass.async_create_task(coordinator.async_request_refresh())
         elif event.event == "buttonAdded":
             async def add_and_refresh():
                 await coordinator.async_refresh()
-                from homeassistant.helpers.dispatcher import async_dispatcher_send
                 async_dispatcher_send(hass, f"{DOMAIN}_{entry.entry_id}_add_button", event.button)
             hass.async_create_task(add_and_refresh())
         elif event.event in ["buttonReady", "buttonConnected", "buttonDisconnected"]:
-            hass.async_create_task(coordinator.async_refresh())
+            update_button_state(event)
         if event.event == "actionMessage":
             hass.bus.fire(EVENT_ACTION_MESSAGE, {
                 EVENT_DATA_ACTION: event.action
@@ -92,54 +153,40 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
             # Persist and dispatch creation if not already created
             if button_id and virtual_device_id and dimmable_type:
-                # Add it to the config entry options (or data)
                 new_device = {
                     "button_id": button_id,
                     "virtual_device_id": virtual_device_id,
                     "dimmable_type": dimmable_type,
                 }
 
-                virtual_devices = entry.data.get(DATA_VIRTUAL_DEVICES, [])
-
-                # Check if it already exists
-                exists = any(d.get("button_id") == button_id and d.get("virtual_device_id") == virtual_device_id for d in virtual_devices)
-
-                if not exists:
-                    _LOGGER.debug(f"Adding new virtual device to config entry: {new_device}")
-                    # Update config entry
-                    new_virtual_devices = virtual_devices + [new_device]
-                    new_data = dict(entry.data)
-                    new_data[DATA_VIRTUAL_DEVICES] = new_virtual_devices
-
-                    # Temporarily unsubscribe to avoid full integration reload on config entry update
-                    data_entry = hass.data[DOMAIN].get(entry.entry_id)
-                    if data_entry and data_entry.unsub_update_listener:
-                        data_entry.unsub_update_listener()
-
-                    hass.config_entries.async_update_entry(entry, data=new_data)
-
-                    # Re-subscribe
-                    if data_entry:
-                        data_entry.unsub_update_listener = entry.add_update_listener(async_reload_entry)
-
+                if store.async_add_virtual_device(new_device):
+                    _LOGGER.debug(f"Adding new virtual device to store: {new_device}")
                     # Dispatch to platform setup
                     _LOGGER.debug(f"Dispatching virtual device creation for {virtual_device_id}")
-                    from homeassistant.helpers.dispatcher import async_dispatcher_send
                     async_dispatcher_send(hass, f"{DOMAIN}_{entry.entry_id}_add_virtual_device", new_device)
                 else:
-                    _LOGGER.debug(f"Virtual device {virtual_device_id} for button {button_id} already exists in config.")
-
-            hass.bus.fire(EVENT_VIRTUAL_DEVICE_UPDATE, {
-                EVENT_DATA_META_DATA: event.meta_data,
-                EVENT_DATA_VALUES: event.values
-            })
+                    _LOGGER.debug(f"Virtual device {virtual_device_id} for button {button_id} already exists in store.")
+
+            with outside_profile():
+                hass.bus.async_fire(EVENT_VIRTUAL_DEVICE_UPDATE, {
+                    EVENT_DATA_META_DATA: event.meta_data,
+                    EVENT_DATA_VALUES: event.values
+                })
+            # Route the update to the entity of this virtual device only
+            async_dispatcher_send(
+                hass,
+                f"{DOMAIN}_{entry.entry_id}_virtual_device_update_{button_id}_{virtual_device_id}",
+                event.values or {}
+            )
 
+    @profiled
     def on_command(command: Command):
         _LOGGER.debug(f"Command: {command.command}, data: {command.data}")
         if command is None:
             return
         if command.command == ServerCommand.SERVER_INFO:
             hub_version = command.data.version
+            coordinator.server_version = hub_version
             if hub_version != REQUIRED_SERVER_VERSION:
                 async_create_issue(
                     hass,
@@ -153,8 +200,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                         "flichub_version": hub_version,
                     },
                 )
+                # Do not rely on the pushes of a server we do not know
+                coordinator.async_tighten_update_interval()
         if command.command == ServerCommand.BUTTONS:
-            update_device_registry_names(command.data)
+            if not coordinator.is_refreshing:
+                coordinator.async_push_received()
+            coordinator.async_update_device_names(command.data)
             coordinator.async_set_updated_data(
                 {
                     DATA_BUTTONS: {button.serial_number: button for button in command.data},
@@ -162,7 +213,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                 }
             )
 
-    client = FlicHubTcpClient(
+    client = FlicHubClient(
         ip=entry.data[CONF_IP_ADDRESS],
         port=entry.data[CONF_PORT],
         loop=asyncio.get_event_loop(),
@@ -171,51 +222,71 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     )
     client_ready = asyncio.Event()
 
-    async def async_update() -> dict:
-        buttons = await client.get_buttons()
-        hub_info = await client.get_hubinfo()
-        if buttons is not None:
-            update_device_registry_names(buttons)
-        return {
-            DATA_BUTTONS: {button.serial_number: button for button in buttons} if buttons is not None else {},
-            DATA_HUB: hub_info if hub_info is not None else {}
-        }
+    async def async_resync():
+        """Bring server info, buttons and hub info up to date in one step."""
+        known_serial_numbers = set(coordinator.data[DATA_BUTTONS])
+        results = await asyncio.gather(
+            client.get_server_info(), coordinator.async_refresh(), return_exceptions=True
+        )
+        for name, result in zip(("server info", "refresh"), results):
+            if isinstance(result, Exception):
+                _LOGGER.warning(f"Failed to resync {name} with Flic Hub: {describe_error(result)}")
+        # Buttons added while we were not connected
+        for serial_number in set(coordinator.data[DATA_BUTTONS]) - known_serial_numbers:
+            async_dispatcher_send(hass, f"{DOMAIN}_{entry.entry_id}_add_button", serial_number)
 
     async def client_connected():
         _LOGGER.debug("Connected!")
+        coordinator.connected = True
+        coordinator.async_tighten_update_interval()
         client_ready.set()
-        await client.get_server_info()
+        if coordinator.data is None:
+            # First connection, the first refresh is done by the setup
+            try:
+                await client.get_server_info()
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                _LOGGER.warning(f"Failed to fetch server info from Flic Hub: {describe_error(e)}")
+        else:
+            # Reconnected, or connected after starting from the snapshot
+            await async_resync()
 
     async def client_disconnected():
         _LOGGER.debug("Disconnected!")
-
-    def stop_client(event):
-        client.disconnect()
+        coordinator.connected = False
 
     client.async_on_connected = client_connected
     client.async_on_disconnected = client_disconnected
 
-    await client.async_connect()
-
-    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_client)
-
-    try:
-        async with asyncio.timeout(CLIENT_READY_TIMEOUT):
-            await client_ready.wait()
-    except asyncio.TimeoutError:
-        _LOGGER.error(f"Client not connected after {CLIENT_READY_TIMEOUT} secs. Discontinuing setup")
-        client.disconnect()
-        raise ConfigEntryNotReady
-
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=entry.title,
-        update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
-        update_method=async_update
-    )
-
-    await coordinator.async_config_entry_first_refresh()
+    store = FlicHubStore(hass, entry.entry_id)
+    await store.async_load()
+    if DATA_VIRTUAL_DEVICES in entry.data:
+        # Virtual devices used to be kept in the config entry
+        for device in entry.data[DATA_VIRTUAL_DEVICES]:
+            store.async_add_virtual_device(device)
+        new_data = dict(entry.data)
+        new_data.pop(DATA_VIRTUAL_DEVICES)
+        hass.config_entries.async_update_entry(entry, data=new_data)
+    coordinator = FlicHubDataUpdateCoordinator(hass, client, entry.title, store)
+
+    snapshot = store.async_get_snapshot()
+    if snapshot is not None:
+        # Create the entities from the last known state right away, they
+        # are resynced with the hub once the connection is up
+        _LOGGER.debug(f"Restored {len(snapshot[DATA_BUTTONS])} buttons from snapshot")
+        coordinator.async_set_updated_data(snapshot)
+        entry.async_create_background_task(hass, client.async_connect(), f"{DOMAIN}_connect_{entry.entry_id}")
+    else:
+        await client.async_connect()
+
+        try:
+            async with asyncio.timeout(CLIENT_READY_TIMEOUT):
+                await client_ready.wait()
+        except asyncio.TimeoutError:
+            _LOGGER.error(f"Client not connected after {CLIENT_READY_TIMEOUT} secs. Discontinuing setup")
+            client.disconnect()
+            raise ConfigEntryNotReady
+
+        await coordinator.async_config_entry_first_refresh()
 
     device_registry = dr.async_get(hass)
     hub_info = coordinator.data.get(DATA_HUB)
@@ -242,88 +313,86 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     data = FlicHubEntryData(
         client=client,
-        coordinator=coordinator
-    )
-
-    data.unsub_update_listener = entry.add_update_listener(async_reload_entry)
-    hass.data[DOMAIN][entry.entry_id] = data
-
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-
-    async def send_virtual_device_update_state(call):
-        """Service to send virtual device update state to Flic Hub."""
-        entry_id = call.data.get("config_entry_id")
-        if entry_id is None:
-            # If not provided, try to use the first available config entry
-            if len(hass.data[DOMAIN]) > 0:
-                entry_id = list(hass.data[DOMAIN].keys())[0]
-            else:
-                _LOGGER.error("No flichub config entries found.")
-                return
-
-        if entry_id not in hass.data[DOMAIN]:
-            _LOGGER.error(f"FlicHub config entry {entry_id} not found.")
-            return
-
-        client = hass.data[DOMAIN][entry_id].client
-        dimmable_type = call.data.get("dimmable_type")
-        virtual_device_id = call.data.get("virtual_device_id")
-        values = call.data.get("values", {})
-
-        client.send_virtual_device_update_state(dimmable_type, virtual_device_id, values)
-
-    hass.services.async_register(
-        DOMAIN,
-        "send_virtual_device_update_state",
-        send_virtual_device_update_state,
+        coordinator=coordinator,
+        store=store,
+        sender=FlicHubVirtualDeviceSender(
+            hass,
+            client,
+            entry.options.get(CONF_MAX_UPDATE_RATE, DEFAULT_MAX_UPDATE_RATE)
+        )
     )
 
-    async def play_ir(call):
-        """Service to play IR signal via Flic Hub."""
-        entry_id = call.data.get("config_entry_id")
-        if entry_id is None:
-            # If not provided, try to use the first available config entry
-            if len(hass.data[DOMAIN]) > 0:
-                entry_id = list(hass.data[DOMAIN].keys())[0]
-            else:
-                _LOGGER.error("No flichub config entries found.")
-                return
-
-        if entry_id not in hass.data[DOMAIN]:
-            _LOGGER.error(f"FlicHub config entry {entry_id} not found.")
-            return
-
-        client = hass.data[DOMAIN][entry_id].client
-        signal_id = call.data.get("signal_id")
+    data.unsub_update_listener = entry.add_update_listener(async_update_options)
+    data.platforms = enabled_platforms(entry)
+    data.options = dict(entry.options)
+    data.address = (entry.data[CONF_IP_ADDRESS], entry.data[CONF_PORT])
+    manager.async_add_entry(entry.entry_id, data)
 
-        await client.play_ir(int(signal_id))
-
-    hass.services.async_register(
-        DOMAIN,
-        "play_ir",
-        play_ir,
-    )
+    await hass.config_entries.async_forward_entry_setups(entry, data.platforms)
 
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
-    hass.data[DOMAIN][entry.entry_id].client.disconnect()
-    unloaded = all(
-        await asyncio.gather(
-            *[
-                hass.config_entries.async_forward_entry_unload(entry, platform)
-                for platform in PLATFORMS
-            ]
-        )
-    )
+    manager: FlicHubManager = hass.data[DOMAIN]
+    data = manager.entries[entry.entry_id]
+    data.unsub_update_listener()
+    await manager.async_stop_recording(entry.entry_id)
+    data.sender.async_shutdown()
+    data.client.disconnect()
+    unloaded = await async_unload_platforms(hass, entry, data, data.platforms)
     if unloaded:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        manager.async_remove_entry(entry.entry_id)
 
     return unloaded
 
 
+async def async_unload_platforms(
+        hass: HomeAssistant, entry: ConfigEntry, data: FlicHubEntryData, platforms: list[str]
+) -> bool:
+    """Unload platforms of an entry along with their discovery listeners."""
+    for platform in platforms:
+        # Unloading a platform runs the unload callbacks of the whole entry,
+        # so the platforms keep theirs apart
+        data.async_unload_platform(platform)
+    return await hass.config_entries.async_unload_platforms(entry, platforms)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data of an entry."""
+    await FlicHubStore(hass, entry.entry_id).async_remove()
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options in place, reconnecting only when the hub address changed."""
+    data: FlicHubEntryData = hass.data[DOMAIN].entries[entry.entry_id]
+    changed = {
+        key for key in set(entry.options) | set(data.options)
+        if entry.options.get(key) != data.options.get(key)
+    }
+    live_options = {CONF_DEADBAND_ENTER, CONF_DEADBAND_EXIT, CONF_MAX_UPDATE_RATE, *map(str, PLATFORMS)}
+    if (entry.data[CONF_IP_ADDRESS], entry.data[CONF_PORT]) != data.address or changed - live_options:
+        await async_reload_entry(hass, entry)
+        return
+    data.options = dict(entry.options)
+
+    if CONF_MAX_UPDATE_RATE in changed:
+        data.sender.async_set_max_rate(entry.options.get(CONF_MAX_UPDATE_RATE, DEFAULT_MAX_UPDATE_RATE))
+    if changed & {CONF_DEADBAND_ENTER, CONF_DEADBAND_EXIT}:
+        async_dispatcher_send(hass, f"{DOMAIN}_{entry.entry_id}_options_updated", data.options)
+
+    # Platforms are added and removed without reconnecting to the hub
+    platforms = enabled_platforms(entry)
+    removed = [platform for platform in data.platforms if platform not in platforms]
+    added = [platform for platform in platforms if platform not in data.platforms]
+    if removed and await async_unload_platforms(hass, entry, data, removed):
+        data.platforms = [platform for platform in data.platforms if platform not in removed]
+    if added:
+        await hass.config_entries.async_forward_entry_setups(entry, added)
+        data.platforms.extend(added)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
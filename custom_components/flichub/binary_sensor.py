@@ -2,9 +2,9 @@
 
 import logging
 
-from homeassistant import core
 from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
-from homeassistant.core import HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
 from pyflichub.button import FlicButton
 from pyflichub.event import Event
@@ -12,22 +12,22 @@ from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from pyflichub.flichub import FlicHubInfo
 from . import FlicHubEntryData
 from .const import DOMAIN
-from .const import EVENT_CLICK, EVENT_DATA_CLICK_TYPE, \
-    EVENT_DATA_SERIAL_NUMBER, EVENT_DATA_NAME, DATA_BUTTONS, DATA_HUB, EVENT_DATA_BUTTON_NUMBER
+from .const import EVENT_DATA_CLICK_TYPE, EVENT_DATA_NAME, DATA_BUTTONS, DATA_HUB, EVENT_DATA_BUTTON_NUMBER
 from .entity import FlicHubButtonEntity, FlicHubEntity
+from .profiler import profiled
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
 async def async_setup_entry(hass, entry, async_add_devices):
     """Setup binary_sensor platform."""
-    data_entry: FlicHubEntryData = hass.data[DOMAIN][entry.entry_id]
+    data_entry: FlicHubEntryData = hass.data[DOMAIN].entries[entry.entry_id]
     buttons = data_entry.coordinator.data[DATA_BUTTONS]
     flic_hub = data_entry.coordinator.data[DATA_HUB]
     devices = []
     for serial_number, button in buttons.items():
         devices.extend([
-            FlicHubButtonBinarySensor(hass, data_entry.coordinator, entry, button, flic_hub),
+            FlicHubButtonBinarySensor(data_entry.coordinator, entry, button, flic_hub),
             FlicHubButtonPassiveBinarySensor(data_entry.coordinator, entry, button, flic_hub),
             FlicHubButtonActiveDisconnectBinarySensor(data_entry.coordinator, entry, button, flic_hub),
             FlicHubButtonConnectedBinarySensor(data_entry.coordinator, entry, button, flic_hub),
@@ -39,18 +39,20 @@ async def async_setup_entry(hass, entry, async_add_devices):
     ])
     async_add_devices(devices)
 
-    def async_add_button(serial_number):
-        button = data_entry.coordinator.data[DATA_BUTTONS].get(serial_number)
+    @callback
+    def async_add_button(button_id):
+        button = data_entry.coordinator.async_get_button(button_id)
         if button:
             async_add_devices([
-                FlicHubButtonBinarySensor(hass, data_entry.coordinator, entry, button, flic_hub),
+                FlicHubButtonBinarySensor(data_entry.coordinator, entry, button, flic_hub),
                 FlicHubButtonPassiveBinarySensor(data_entry.coordinator, entry, button, flic_hub),
                 FlicHubButtonActiveDisconnectBinarySensor(data_entry.coordinator, entry, button, flic_hub),
                 FlicHubButtonConnectedBinarySensor(data_entry.coordinator, entry, button, flic_hub),
                 FlicHubButtonReadyBinarySensor(data_entry.coordinator, entry, button, flic_hub)
             ])
 
-    entry.async_on_unload(
+    data_entry.async_on_platform_unload(
+        Platform.BINARY_SENSOR,
         async_dispatcher_connect(hass, f"{DOMAIN}_{entry.entry_id}_add_button", async_add_button)
     )
 
@@ -124,6 +126,7 @@ class FlicHubButtonReadyBinarySensor(FlicHubButtonEntity, BinarySensorEntity):
     _attr_device_class = BinarySensorDeviceClass.PROBLEM
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_name = "Ready"
+    _button_fields = FlicHubButtonEntity._button_fields | {"ready"}
 
     def __init__(self, coordinator, config_entry, button: FlicButton, flic_hub: FlicHubInfo):
         super().__init__(coordinator, config_entry, button.serial_number, flic_hub)
@@ -155,6 +158,7 @@ class FlicHubButtonPassiveBinarySensor(FlicHubButtonEntity, BinarySensorEntity):
     """flichub sensor class."""
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_name = "Passive Mode"
+    _button_fields = FlicHubButtonEntity._button_fields | {"passive_mode"}
 
     def __init__(self, coordinator, config_entry, button: FlicButton, flic_hub: FlicHubInfo):
         super().__init__(coordinator, config_entry, button.serial_number, flic_hub)
@@ -170,6 +174,7 @@ class FlicHubButtonActiveDisconnectBinarySensor(FlicHubButtonEntity, BinarySenso
     """flichub sensor class."""
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_name = "Active Disconnect"
+    _button_fields = FlicHubButtonEntity._button_fields | {"active_disconnect"}
 
     def __init__(self, coordinator, config_entry, button: FlicButton, flic_hub: FlicHubInfo):
         super().__init__(coordinator, config_entry, button.serial_number, flic_hub)
@@ -187,13 +192,23 @@ class FlicHubButtonBinarySensor(FlicHubButtonEntity, BinarySensorEntity):
     _attr_name = None
     _attr_icon = "mdi:hockey-puck"
 
-    def __init__(self, hass: HomeAssistant, coordinator, config_entry, button: FlicButton, flic_hub: FlicHubInfo):
+    def __init__(self, coordinator, config_entry, button: FlicButton, flic_hub: FlicHubInfo):
         super().__init__(coordinator, config_entry, button.serial_number, flic_hub)
         self._attr_unique_id = f"{self.serial_number}-button"
         self._is_on = False
         self._click_type = None
         self._button_number = None
-        hass.bus.async_listen(EVENT_CLICK, self._event_callback)
+
+    async def async_added_to_hass(self) -> None:
+        """Run when entity about to be added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{DOMAIN}_{self.config_entry.entry_id}_click_{self.serial_number}",
+                self._event_callback
+            )
+        )
 
     @property
     def is_on(self):
@@ -210,15 +225,13 @@ class FlicHubButtonBinarySensor(FlicHubButtonEntity, BinarySensorEntity):
         attrs.update(super().extra_state_attributes)
         return attrs
 
-    def _event_callback(self, event: core.Event):
-        serial_number = event.data[EVENT_DATA_SERIAL_NUMBER]
+    @callback
+    @profiled
+    def _event_callback(self, event_data: dict):
         """Update the entity."""
-        if self.serial_number != serial_number:
-            return
-
-        name = event.data[EVENT_DATA_NAME]
-        click_type: Event = event.data[EVENT_DATA_CLICK_TYPE]
-        button_number = event.data.get(EVENT_DATA_BUTTON_NUMBER)
+        name = event_data[EVENT_DATA_NAME]
+        click_type: Event = event_data[EVENT_DATA_CLICK_TYPE]
+        button_number = event_data.get(EVENT_DATA_BUTTON_NUMBER)
 
         _LOGGER.debug(f"Button {name} clicked: {click_type}, button_number: {button_number}")
 
@@ -234,4 +247,4 @@ class FlicHubButtonBinarySensor(FlicHubButtonEntity, BinarySensorEntity):
             self._is_on = True
         if click_type == 'up':
             self._is_on = False
-        self.schedule_update_ha_state()
+        self.async_write_ha_state()
@@ -0,0 +1,179 @@
+"""TCP client for Flic Hub."""
+import asyncio
+import logging
+import random
+import time
+
+from pyflichub.client import FlicHubTcpClient, ServerCommand
+from pyflichub.command import Command
+from pyflichub.event import Event
+
+from .const import RECONNECT_MIN_DELAY, RECONNECT_MAX_DELAY, REQUEST_TIMEOUT, PRIORITY_INTERACTIVE, \
+    PRIORITY_IR, PRIORITY_POLL, IR_COMMAND_GAP
+from .recorder import FlicHubRecorder
+from .scheduler import FlicHubCommandScheduler
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def describe_error(error: BaseException) -> str:
+    """Return the message of an error, or its type if it has none, e.g. for a timeout."""
+    return str(error) or type(error).__name__
+
+
+class FlicHubClient(FlicHubTcpClient):
+    """FlicHubTcpClient that reconnects with a jittered exponential backoff.
+
+    The library retries a lost connection at a fixed interval and does not tell
+    anyone the connection was lost. This client backs off between attempts and
+    calls ``async_on_disconnected`` when the hub drops the connection, so the
+    integration can resync once ``async_on_connected`` is called again.
+
+    Requests are pipelined. The hub replies with the name of the command
+    only, so that name is the correlation id: every command has its own
+    waiters, replies may arrive in any order and a request for one command
+    never waits behind another. Concurrent requests for the same command
+    share the one in flight. Each request has its own timeout.
+
+    All writes go through a ``FlicHubCommandScheduler``: virtual device
+    updates before IR before requests.
+
+    While ``recorder`` is set every line received from the hub is recorded
+    before it is handled.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reconnect_count = 0
+        self._waiters: dict[str, list[asyncio.Future]] = {}
+        self.scheduler = FlicHubCommandScheduler(self._loop, self._write)
+        self.recorder: FlicHubRecorder | None = None
+
+    def _write(self, line: str):
+        if self._transport is not None:
+            self._transport.write(f"{line}\n".encode())
+        else:
+            _LOGGER.error("Connection seems to be closed.")
+
+    def send_virtual_device_update_state(self, dimmable_type: str, virtual_device_id: str, values: dict):
+        self.scheduler.submit(
+            PRIORITY_INTERACTIVE,
+            {
+                "command": "virtualDeviceUpdateState",
+                "dimmableType": dimmable_type,
+                "virtualDeviceId": virtual_device_id,
+                "values": values,
+            },
+            key=(dimmable_type, virtual_device_id)
+        )
+
+    def play_ir(self, signal_id: str):
+        self.scheduler.submit(PRIORITY_IR, {"command": ServerCommand.PLAY_IR, "signal_id": signal_id},
+                              hold=IR_COMMAND_GAP)
+
+    def play_ir_raw(self, arr: list[int]):
+        # Hold back further IR until the hub has played this signal
+        duration = sum(abs(interval) for interval in arr[1:]) / 1_000_000
+        self.scheduler.submit(PRIORITY_IR, {"command": ServerCommand.PLAY_IR_RAW, "arr": arr},
+                              hold=duration + IR_COMMAND_GAP)
+
+    def data_received(self, data):
+        if self.recorder is not None:
+            # The lines the library is about to split off its buffer
+            *lines, _ = (self._buffer + data).split(b"\n")
+            for line in lines:
+                line = line.strip()
+                if line and line != b"pong":
+                    self.recorder.record(line)
+        super().data_received(data)
+
+    def pause_writing(self):
+        self.scheduler.pause()
+
+    def resume_writing(self):
+        self.scheduler.resume()
+
+    async def _async_send_command_and_wait_for_data(
+            self, cmd: ServerCommand, timeout: float = REQUEST_TIMEOUT
+    ) -> Command:
+        """Send a command, or join the one in flight, and wait for its reply."""
+        if self._transport is None:
+            raise ConnectionError(f"Not connected to {self._server_address}")
+        waiters = self._waiters.setdefault(cmd, [])
+        waiter = self._loop.create_future()
+        waiters.append(waiter)
+        if len(waiters) == 1:
+            self.scheduler.submit(PRIORITY_POLL, str(cmd), key=cmd)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.warning(f"Waited for '{cmd}' data for {timeout} secs.")
+            raise
+        finally:
+            if waiter in waiters:
+                # Timed out or cancelled, the next request sends the command again
+                waiters.remove(waiter)
+
+    def _handle_command(self, cmd: Command):
+        # The library only knows commands it has requested itself
+        self._data_ready.setdefault(cmd.command, None)
+        super()._handle_command(cmd)
+        if cmd.data is None:
+            return
+        for waiter in self._waiters.pop(cmd.command, []):
+            if not waiter.done():
+                waiter.set_result(cmd)
+
+    def _handle_event(self, event: Event):
+        if event.event == "buttonAdded" and not self._get_button(event.button):
+            # The library would fetch the buttons in a task nobody awaits, so a
+            # failed request would go unhandled. The event callback refreshes the
+            # coordinator instead, which handles failures.
+            _LOGGER.debug(f"Button {event.button} added")
+            if self._event_callback is not None:
+                self._event_callback(None, event)
+            return
+        super()._handle_event(event)
+
+    async def _async_connect(self):
+        """Connect to the socket, backing off between failed attempts."""
+        attempt = 0
+        try:
+            while self._connecting and not self._forced_disconnect:
+                _LOGGER.info("Trying to connect to %s", self._server_address)
+                try:
+                    await asyncio.wait_for(
+                        self._loop.create_connection(lambda: self, *self._server_address), self._reconnect_timeout
+                    )
+                    self._tcp_check_timer = time.time()
+                    self._tcp_disconnect_timer = time.time()
+                    self._check_connection()
+                    return
+                except (asyncio.TimeoutError, OSError) as e:
+                    delay = min(RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY * 2 ** attempt)
+                    # Jitter so that several hubs dropped at once do not reconnect in lockstep
+                    delay *= random.uniform(0.5, 1.0)
+                    attempt += 1
+                    _LOGGER.warning(
+                        "Failed to connect to %s (%s), trying again in %.1f secs",
+                        self._server_address, describe_error(e), delay
+                    )
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            _LOGGER.debug("Connect attempt to %s cancelled", self._server_address)
+
+    def connection_lost(self, exc):
+        forced = self._forced_disconnect
+        super().connection_lost(exc)
+        # The replies to requests in flight are lost with the connection
+        for waiters in self._waiters.values():
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(ConnectionError(f"Connection to {self._server_address} lost"))
+        self._waiters.clear()
+        self.scheduler.clear()
+        if forced:
+            return
+        self.reconnect_count += 1
+        if self.async_on_disconnected is not None:
+            self._loop.create_task(self.async_on_disconnected())
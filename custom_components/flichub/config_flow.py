@@ -13,7 +13,7 @@ from homeassistant.core import callback
 from homeassistant.helpers.device_registry import format_mac
 from pyflichub.client import FlicHubTcpClient
 from .const import CLIENT_READY_TIMEOUT
-from .const import CONF_DEADBAND_ENTER, CONF_DEADBAND_EXIT
+from .const import CONF_DEADBAND_ENTER, CONF_DEADBAND_EXIT, CONF_MAX_UPDATE_RATE, DEFAULT_MAX_UPDATE_RATE
 from .const import DOMAIN
 from .const import PLATFORMS
 
@@ -174,11 +174,14 @@ class FlicHubOptionsFlowHandler(config_entries.OptionsFlow):
             return await self._update_options()
 
         schema = {
-            vol.Required(x.value, default=self.options.get(x.value, True)): bool
+            vol.Required(str(x), default=self.options.get(str(x), True)): bool
             for x in sorted(PLATFORMS)
         }
         schema[vol.Optional(CONF_DEADBAND_ENTER, default=self.options.get(CONF_DEADBAND_ENTER, 2))] = int
         schema[vol.Optional(CONF_DEADBAND_EXIT, default=self.options.get(CONF_DEADBAND_EXIT, 5))] = int
+        schema[vol.Optional(
+            CONF_MAX_UPDATE_RATE, default=self.options.get(CONF_MAX_UPDATE_RATE, DEFAULT_MAX_UPDATE_RATE)
+        )] = vol.All(int, vol.Range(min=1))
 
         return self.async_show_form(
             step_id="user",
@@ -8,11 +8,38 @@ DOMAIN_DATA = f"{DOMAIN}_data"
 VERSION = "0.0.0"
 REQUIRED_SERVER_VERSION = "0.1.13"
 DEFAULT_SCAN_INTERVAL = 60
+MAX_SCAN_INTERVAL = 600
+REQUEST_REFRESH_COOLDOWN = 2.0
+REQUEST_TIMEOUT = 5.0
 
 CLIENT_READY_TIMEOUT = 20.0
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+# Outbound command priorities, highest first
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_IR = "ir"
+PRIORITY_POLL = "poll"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_IR, PRIORITY_POLL)
+QUEUE_SIZES = {PRIORITY_INTERACTIVE: 50, PRIORITY_IR: 20, PRIORITY_POLL: 10}
+IR_COMMAND_GAP = 0.1
+
+TWIST_TICK_INTERVAL = 0.333
+
+# Recordings of the event stream, duration in secs
+RECORDING_DEFAULT_DURATION = 60
+RECORDING_MAX_DURATION = 3600
+RECORDING_MAX_LINES = 200_000
+
+# Profiling of the hot callbacks, duration in secs
+PROFILE_DEFAULT_DURATION = 60
+PROFILE_MAX_DURATION = 600
 
 CONF_DEADBAND_ENTER = "deadband_enter"
 CONF_DEADBAND_EXIT = "deadband_exit"
+CONF_MAX_UPDATE_RATE = "max_update_rate"
+
+DEFAULT_MAX_UPDATE_RATE = 10
 
 # Icons
 ICON = "mdi:format-quote-close"
@@ -43,14 +70,6 @@ PLATFORMS = [Platform.BINARY_SENSOR, Platform.SENSOR, Platform.LIGHT, Platform.M
 # Defaults
 DEFAULT_NAME = DOMAIN
 
-def get_button_by_id(buttons, button_id: str):
-    """Helper function to find a button by serial_number or bdaddr."""
-    if button_id in buttons:
-        return buttons[button_id]
-    for button in buttons.values():
-        if button.bdaddr == button_id:
-            return button
-    return None
 try:
     from homeassistant.components.infrared import InfraredEntity
     PLATFORMS.append(Platform("infrared") if hasattr(Platform, "INFRARED") else "infrared")
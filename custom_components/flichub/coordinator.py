@@ -0,0 +1,205 @@
+"""DataUpdateCoordinator for Flic Hub."""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Awaitable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from pyflichub.button import FlicButton
+from pyflichub.client import FlicHubTcpClient
+
+from .const import DOMAIN, DATA_BUTTONS, DATA_HUB, DEFAULT_SCAN_INTERVAL, MAX_SCAN_INTERVAL, \
+    REQUEST_REFRESH_COOLDOWN, REQUEST_TIMEOUT, REQUIRED_SERVER_VERSION
+from .metrics import FlicHubMetrics
+from .profiler import profiled
+from .store import FlicHubStore
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class FlicHubDataUpdateCoordinator(DataUpdateCoordinator[dict]):
+    """Class to manage fetching buttons and hub info from the Flic Hub."""
+
+    def __init__(self, hass: HomeAssistant, client: FlicHubTcpClient, name: str, store: FlicHubStore):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=name,
+            update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
+            # Collapse bursts of refresh requests, e.g. when a hub reboots, into one refresh
+            request_refresh_debouncer=Debouncer(
+                hass,
+                _LOGGER,
+                cooldown=REQUEST_REFRESH_COOLDOWN,
+                immediate=False
+            )
+        )
+        self.client = client
+        self.store = store
+        self.last_refresh_duration: float | None = None
+        self.metrics = FlicHubMetrics()
+        self.connected = False
+        self.server_version: str | None = None
+        self._refreshing = False
+        self._push_received = False
+        self._button_snapshots: dict[str, dict] = {}
+        self._serial_numbers_by_bdaddr: dict[str, str] = {}
+        self._listeners_update_success = True
+        self._snapshot_pending = False
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the listeners whose button fields changed since the last update.
+
+        Button entities register with a ``(serial_number, fields)`` context. Listeners
+        without a context, such as the hub entities, are always notified.
+        """
+        changed = self._async_diff_buttons()
+        if self._snapshot_pending and self.last_update_success and self.data and self.data.get(DATA_HUB) is not None:
+            # Only after a refresh or when buttons come and go, not for every patched event
+            self._snapshot_pending = False
+            self.store.async_update_snapshot(self.data)
+        notify_all = self.last_update_success != self._listeners_update_success
+        self._listeners_update_success = self.last_update_success
+        for update_callback, context in list(self._listeners.values()):
+            if notify_all or context is None:
+                update_callback()
+                continue
+            serial_number, fields = context
+            if not fields.isdisjoint(changed.get(serial_number, ())):
+                update_callback()
+
+    @callback
+    def _async_diff_buttons(self) -> dict[str, set[str]]:
+        """Compare the buttons field by field with the previous snapshot."""
+        buttons = self.data.get(DATA_BUTTONS, {}) if self.data else {}
+        changed = {}
+        snapshots = {}
+        for serial_number, button in buttons.items():
+            snapshot = dict(vars(button))
+            previous = self._button_snapshots.get(serial_number)
+            if previous is None:
+                changed[serial_number] = set(snapshot)
+            elif previous != snapshot:
+                changed[serial_number] = {
+                    field for field, value in snapshot.items() if previous.get(field) != value
+                }
+            snapshots[serial_number] = snapshot
+        if snapshots.keys() != self._button_snapshots.keys():
+            # The set of buttons changed, rebuild the bluetooth address index
+            self._snapshot_pending = True
+            self._serial_numbers_by_bdaddr = {
+                button.bdaddr: serial_number for serial_number, button in buttons.items()
+            }
+        self._button_snapshots = snapshots
+        return changed
+
+    @callback
+    def async_get_button(self, button_id: str) -> FlicButton | None:
+        """Return a button by its serial number or bluetooth address."""
+        buttons = self.data[DATA_BUTTONS] if self.data else {}
+        if button_id in buttons:
+            return buttons[button_id]
+        serial_number = self._serial_numbers_by_bdaddr.get(button_id)
+        return buttons.get(serial_number) if serial_number is not None else None
+
+    def async_update_device_names(self, buttons: list[FlicButton]):
+        """Keep the device registry names in sync with the button names."""
+        device_registry = dr.async_get(self.hass)
+        for button in buttons:
+            device = device_registry.async_get_device(identifiers={(DOMAIN, button.serial_number)})
+            if device and device.name != button.name:
+                device_registry.async_update_device(device.id, name=button.name)
+
+    async def _async_request(self, request: Awaitable[Any], name: str) -> Any:
+        """Await a single hub request, returning None if it fails or times out."""
+        try:
+            async with asyncio.timeout(REQUEST_TIMEOUT):
+                return await request
+        except asyncio.TimeoutError:
+            _LOGGER.warning(f"No {name} reply from Flic Hub within {REQUEST_TIMEOUT} secs")
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.warning(f"Failed to fetch {name} from Flic Hub: {e}")
+        return None
+
+    @property
+    def is_refreshing(self) -> bool:
+        """Return True while the coordinator is fetching data from the hub."""
+        return self._refreshing
+
+    @callback
+    def async_push_received(self) -> None:
+        """Note that the hub pushed data without being polled."""
+        self._push_received = True
+
+    @callback
+    def async_tighten_update_interval(self) -> None:
+        """Go back to the default poll interval, e.g. after a reconnect or a version mismatch."""
+        self._push_received = False
+        if self.update_interval == timedelta(seconds=DEFAULT_SCAN_INTERVAL):
+            return
+        _LOGGER.debug(f"Polling {self.name} every {DEFAULT_SCAN_INTERVAL} secs")
+        self.update_interval = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def _async_stretch_update_interval(self) -> None:
+        """Poll less often while the push channel keeps the data up to date."""
+        if not self.connected or not self._push_received or self.server_version != REQUIRED_SERVER_VERSION:
+            self.async_tighten_update_interval()
+            return
+        self._push_received = False
+        seconds = min(self.update_interval.total_seconds() * 2, MAX_SCAN_INTERVAL)
+        if seconds != self.update_interval.total_seconds():
+            _LOGGER.debug(f"Polling {self.name} every {seconds} secs")
+            self.update_interval = timedelta(seconds=seconds)
+
+    @profiled
+    async def _async_update_data(self) -> dict:
+        """Fetch the data and adapt the poll interval to the health of the push channel."""
+        self._refreshing = True
+        try:
+            data = await self._async_fetch_data()
+        except UpdateFailed:
+            self.async_tighten_update_interval()
+            raise
+        finally:
+            self._refreshing = False
+        self._async_stretch_update_interval()
+        self._snapshot_pending = True
+        return data
+
+    async def _async_fetch_data(self) -> dict:
+        """Fetch buttons and hub info from the hub concurrently."""
+        if not self.connected:
+            raise UpdateFailed(f"Not connected to {self.name}")
+        start = time.monotonic()
+        buttons, hub_info = await asyncio.gather(
+            self._async_request(self.client.get_buttons(), "buttons"),
+            self._async_request(self.client.get_hubinfo(), "hub info"),
+        )
+        self.last_refresh_duration = time.monotonic() - start
+        self.metrics.refresh_duration.record(self.last_refresh_duration * 1000)
+        _LOGGER.debug(f"Refreshed {self.name} in {self.last_refresh_duration:.3f} secs")
+
+        if buttons is None and hub_info is None:
+            raise UpdateFailed("Unable to fetch buttons and hub info from Flic Hub")
+        # Keep the last known value of whichever request did not make it
+        previous = self.data or {}
+        if buttons is None and DATA_BUTTONS not in previous:
+            raise UpdateFailed("Unable to fetch buttons from Flic Hub")
+        if hub_info is None and previous.get(DATA_HUB) is None:
+            raise UpdateFailed("Unable to fetch hub info from Flic Hub")
+
+        if buttons is not None:
+            self.async_update_device_names(buttons)
+        return {
+            DATA_BUTTONS: {button.serial_number: button for button in buttons} if buttons is not None
+            else previous[DATA_BUTTONS],
+            DATA_HUB: hub_info if hub_info is not None else previous[DATA_HUB]
+        }
@@ -3,33 +3,34 @@ import logging
 from typing import Any
 
 from homeassistant.components.cover import CoverEntity, CoverDeviceClass, CoverEntityFeature
-from homeassistant.core import HomeAssistant, Event
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from pyflichub.flichub import FlicHubInfo
-from pyflichub.twist_controller import RateDetentController
 
 from . import FlicHubEntryData
 from .const import CONF_DEADBAND_ENTER, CONF_DEADBAND_EXIT
-from .const import DOMAIN, DATA_BUTTONS, DATA_HUB, DATA_VIRTUAL_DEVICES, get_button_by_id
-from .const import EVENT_VIRTUAL_DEVICE_UPDATE, EVENT_DATA_META_DATA, EVENT_DATA_VALUES
+from .const import DOMAIN, DATA_HUB
 from .entity import FlicHubButtonEntity
+from .profiler import profiled
+from .twist import FlicHubTwistController
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
     """Set up the cover platform."""
-    data_entry: FlicHubEntryData = hass.data[DOMAIN][entry.entry_id]
+    data_entry: FlicHubEntryData = hass.data[DOMAIN].entries[entry.entry_id]
     flic_hub = data_entry.coordinator.data[DATA_HUB]
 
     # Add existing virtual devices
-    virtual_devices = entry.data.get(DATA_VIRTUAL_DEVICES, [])
+    virtual_devices = data_entry.store.virtual_devices
     devices = []
     for device_info in virtual_devices:
         if device_info.get("dimmable_type") == "Blind":
             button_id = device_info.get("button_id")
             virtual_device_id = device_info.get("virtual_device_id")
-            button = get_button_by_id(data_entry.coordinator.data[DATA_BUTTONS], button_id)
+            button = data_entry.coordinator.async_get_button(button_id)
             if button:
                 devices.append(
                     FlicHubVirtualBlind(
@@ -45,12 +46,13 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
     if devices:
         async_add_devices(devices)
 
+    @callback
     def async_add_virtual_device(device_info):
         """Add virtual device dynamically."""
         if device_info.get("dimmable_type") == "Blind":
             button_id = device_info.get("button_id")
             virtual_device_id = device_info.get("virtual_device_id")
-            button = get_button_by_id(data_entry.coordinator.data[DATA_BUTTONS], button_id)
+            button = data_entry.coordinator.async_get_button(button_id)
             if button:
                 async_add_devices([
                     FlicHubVirtualBlind(
@@ -63,7 +65,8 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
                     )
                 ])
 
-    entry.async_on_unload(
+    data_entry.async_on_platform_unload(
+        Platform.COVER,
         async_dispatcher_connect(hass, f"{DOMAIN}_{entry.entry_id}_add_virtual_device", async_add_virtual_device)
     )
 
@@ -86,7 +89,8 @@ class FlicHubVirtualBlind(FlicHubButtonEntity, CoverEntity):
 
         # State
         self._position = 100 # Default open
-        self._position_controller = RateDetentController(
+        self._position_controller = FlicHubTwistController(
+            hass.data[DOMAIN].twist_engine,
             cfg={
                 "minOutPct": 0,
                 "maxOutPct": 100,
@@ -94,45 +98,59 @@ class FlicHubVirtualBlind(FlicHubButtonEntity, CoverEntity):
                 "deadbandExit": config_entry.options.get(CONF_DEADBAND_EXIT, 5),
             },
             on_change_callback=self._on_position_change,
-            loop=hass.loop
+            latency=coordinator.metrics.twist_latency
         )
 
+    @callback
     def _on_position_change(self, new_position_pct: int) -> None:
-        """Handle smoothed position changes from the RateDetentController."""
+        """Handle smoothed position changes from the twist controller."""
+        if new_position_pct == self._position:
+            return
         self._position = new_position_pct
-        self.schedule_update_ha_state()
+        self.async_write_ha_state()
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
         await super().async_added_to_hass()
+        # Updates may address the twist by serial number or by bluetooth address
+        for button_id in (self.serial_number, self.button.bdaddr):
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    f"{DOMAIN}_{self.config_entry.entry_id}_virtual_device_update_{button_id}_{self._virtual_device_id}",
+                    self._event_callback
+                )
+            )
         self.async_on_remove(
-            self.hass.bus.async_listen(EVENT_VIRTUAL_DEVICE_UPDATE, self._event_callback)
+            async_dispatcher_connect(
+                self.hass,
+                f"{DOMAIN}_{self.config_entry.entry_id}_options_updated",
+                self._options_updated
+            )
         )
 
+    @callback
+    def _options_updated(self, options: dict) -> None:
+        """Apply changed deadband options to the running controller."""
+        self._position_controller.deadband_enter = options.get(CONF_DEADBAND_ENTER, 2)
+        self._position_controller.deadband_exit = options.get(CONF_DEADBAND_EXIT, 5)
+
     async def async_will_remove_from_hass(self) -> None:
         """Run when entity will be removed from hass."""
         await super().async_will_remove_from_hass()
         if self._position_controller:
             self._position_controller.stop()
 
-    def _event_callback(self, event: Event):
+    @callback
+    @profiled
+    def _event_callback(self, values: dict):
         """Handle virtual device update event."""
-        meta_data = event.data.get(EVENT_DATA_META_DATA, {})
-        button_id = meta_data.get("button_id")
-        virtual_device_id = meta_data.get("virtual_device_id")
-
-        if button_id not in [self.serial_number, self.button.bdaddr] or virtual_device_id != self._virtual_device_id:
-            return
-
-        values = event.data.get(EVENT_DATA_VALUES, {})
-
         # The values themselves are always floating point numbers between 0 and 1
-        # Extract and convert values
+        # Extract and convert values, the position state is written by the
+        # controller once the smoothed value actually moves
         if "position" in values:
             self._position_controller.update_raw(values["position"] * 100)
 
-        self.schedule_update_ha_state()
-
     @property
     def current_cover_position(self) -> int | None:
         """Return current position of cover. None is unknown, 0 is closed, 100 is fully open."""
@@ -148,9 +166,9 @@ class FlicHubVirtualBlind(FlicHubButtonEntity, CoverEntity):
     async def async_set_cover_position(self, **kwargs: Any) -> None:
         """Move the cover to a specific position."""
         position = kwargs.get("position", 100)
-        client = self.coordinator.hass.data[DOMAIN][self.config_entry.entry_id].client
+        sender = self.coordinator.hass.data[DOMAIN].entries[self.config_entry.entry_id].sender
         values = {"position": position / 100.0}
         self._position = position
         self._position_controller.actual_out_pct = position
-        client.send_virtual_device_update_state("Blind", self._virtual_device_id, values)
+        sender.async_send("Blind", self._virtual_device_id, values)
         self.async_write_ha_state()
\ No newline at end of file
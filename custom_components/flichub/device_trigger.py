@@ -8,10 +8,10 @@ from homeassistant.const import (
     CONF_PLATFORM,
     CONF_TYPE,
 )
-from homeassistant.core import HomeAssistant, CALLBACK_TYPE
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, Context, Event, HassJob, callback
 from homeassistant.helpers import config_validation as cv, device_registry as dr, entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from homeassistant.helpers.trigger import TriggerActionType, TriggerInfo
-from homeassistant.components.homeassistant.triggers import event as event_trigger
 
 import re
 
@@ -27,6 +27,24 @@ TRIGGER_SCHEMA = DEVICE_TRIGGER_BASE_SCHEMA.extend(
 )
 
 
+def _trigger_signal(serial_number: str, click_type: str, button_number: int | None) -> str:
+    return f"{DOMAIN}_device_trigger_{serial_number}_{click_type}_{button_number}"
+
+
+@callback
+def async_fire_device_triggers(hass: HomeAssistant, event_data: dict, context: Context) -> None:
+    """Run the device triggers attached to the button, click type and button number of a click."""
+    serial_number = event_data[EVENT_DATA_SERIAL_NUMBER]
+    click_type = event_data[EVENT_DATA_CLICK_TYPE]
+    button_number = event_data.get(EVENT_DATA_BUTTON_NUMBER)
+    event = Event(EVENT_CLICK, event_data, context=context)
+
+    # Triggers without a button number match every button of the device
+    async_dispatcher_send(hass, _trigger_signal(serial_number, click_type, None), event)
+    if button_number is not None:
+        async_dispatcher_send(hass, _trigger_signal(serial_number, click_type, button_number), event)
+
+
 async def async_get_triggers(
     hass: HomeAssistant, device_id: str
 ) -> list[dict]:
@@ -117,21 +135,27 @@ async def async_attach_trigger(
     trigger_type = match.group(1)
     button_number_str = match.group(2)
 
-    event_data = {
-        EVENT_DATA_SERIAL_NUMBER: serial_number,
-        EVENT_DATA_CLICK_TYPE: trigger_type,
-    }
-
-    if button_number_str is not None:
-        event_data[EVENT_DATA_BUTTON_NUMBER] = int(button_number_str)
-
-    # Listen for the corresponding EVENT_CLICK
-    event_config = event_trigger.TRIGGER_SCHEMA({
-        event_trigger.CONF_PLATFORM: "event",
-        event_trigger.CONF_EVENT_TYPE: EVENT_CLICK,
-        event_trigger.CONF_EVENT_DATA: event_data,
-    })
-
-    return await event_trigger.async_attach_trigger(
-        hass, event_config, action, trigger_info, platform_type="device"
-    )
+    button_number = int(button_number_str) if button_number_str is not None else None
+
+    job = HassJob(action, f"{DOMAIN} device trigger {trigger_info}")
+    trigger_data = trigger_info["trigger_data"]
+
+    @callback
+    def handle_event(event: Event) -> None:
+        """Run the action, the payload matches the one of an event trigger on EVENT_CLICK."""
+        hass.async_run_hass_job(
+            job,
+            {
+                "trigger": {
+                    **trigger_data,
+                    "platform": "device",
+                    "event": event,
+                    "description": f"event '{event.event_type}'",
+                }
+            },
+            event.context,
+        )
+
+    # Clicks are dispatched by serial number, click type and button number
+    # directly from the hub connection, see async_fire_device_triggers
+    return async_dispatcher_connect(hass, _trigger_signal(serial_number, trigger_type, button_number), handle_event)
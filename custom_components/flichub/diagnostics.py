@@ -0,0 +1,37 @@
+"""Diagnostics support for Flic Hub."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_IP_ADDRESS
+from homeassistant.core import HomeAssistant
+
+from . import FlicHubEntryData
+from .const import DOMAIN, DATA_BUTTONS
+
+TO_REDACT = {CONF_IP_ADDRESS}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    manager = hass.data[DOMAIN]
+    data: FlicHubEntryData = manager.entries[entry.entry_id]
+    coordinator = data.coordinator
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+            "platforms": [str(platform) for platform in data.platforms],
+        },
+        "hub": {
+            "server_version": coordinator.server_version,
+            "connected": coordinator.connected,
+            "reconnect_count": data.client.reconnect_count,
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "buttons": len(coordinator.data[DATA_BUTTONS]) if coordinator.data else 0,
+        },
+        "metrics": coordinator.metrics.as_dict(),
+        "outbound_queues": data.client.scheduler.stats,
+        "twist_engine": manager.twist_engine.stats,
+    }
@@ -14,9 +14,12 @@ from .const import DOMAIN, DATA_BUTTONS, DATA_HUB
 
 class FlicHubButtonEntity(CoordinatorEntity):
     _attr_has_entity_name = True
+    # Button fields the state of this entity depends on, the coordinator only
+    # notifies the entity when one of these changed
+    _button_fields = frozenset({"bdaddr", "color", "connected"})
 
     def __init__(self, coordinator, config_entry, serial_number, flic_hub: FlicHubInfo):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(serial_number, self._button_fields))
         self.coordinator = coordinator
         self.serial_number = serial_number
         self.config_entry = config_entry
@@ -64,7 +67,11 @@ class FlicHubButtonEntity(CoordinatorEntity):
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        return self.button.connected
+        if not self.coordinator.last_update_success:
+            # The hub is unreachable, the last known state may be stale
+            return False
+        button = self.coordinator.data[DATA_BUTTONS].get(self.serial_number)
+        return button is not None and button.connected
 
 
 class FlicHubEntity(CoordinatorEntity):
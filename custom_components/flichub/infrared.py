@@ -3,12 +3,20 @@ try:
 except ImportError:
     InfraredEntity = object
     InfraredCommand = object
+from array import array
+from collections import OrderedDict
+
 from .entity import FlicHubEntity
 from .const import DOMAIN, DATA_HUB
+from .ir_library import compile_signal
+
+# Compiled signals kept per entity, the least recently sent are dropped
+COMPILED_CACHE_SIZE = 64
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the Flic Hub infrared platform."""
-    data = hass.data[DOMAIN][entry.entry_id]
+    manager = hass.data[DOMAIN]
+    data = manager.entries[entry.entry_id]
     coordinator = data.coordinator
     client = data.client
 
@@ -27,6 +35,7 @@ class FlicHubInfraredEntity(FlicHubEntity, InfraredEntity):
         """Initialize the infrared entity."""
         super().__init__(coordinator, config_entry, flic_hub)
         self.client = client
+        self._compiled: OrderedDict[tuple, array] = OrderedDict()
         self._attr_unique_id = f"{self.mac_address}-infrared"
 
     @property
@@ -38,11 +47,16 @@ class FlicHubInfraredEntity(FlicHubEntity, InfraredEntity):
 
     async def async_send_command(self, command: InfraredCommand) -> None:
         """Send an IR command."""
-        timings = [
-            interval
-            for timing in command.get_raw_timings()
-            for interval in (timing.high_us, -timing.low_us)
-        ]
-
-        arr = [command.modulation] + timings
-        await self.client.play_ir_raw(arr)
+        timings = tuple((timing.high_us, timing.low_us) for timing in command.get_raw_timings())
+        key = (command.modulation, timings)
+        signal = self._compiled.get(key)
+        if signal is None:
+            signal = compile_signal(
+                command.modulation, (interval for high, low in timings for interval in (high, -low))
+            )
+            if len(self._compiled) >= COMPILED_CACHE_SIZE:
+                self._compiled.popitem(last=False)
+            self._compiled[key] = signal
+        else:
+            self._compiled.move_to_end(key)
+        self.client.play_ir_raw(signal.tolist())
@@ -0,0 +1,106 @@
+"""Persistent library of raw IR signals for Flic Hub."""
+import base64
+import hashlib
+import logging
+from array import array
+from typing import Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10
+
+# Signed 32 bit, microsecond intervals and carrier frequencies both fit
+TYPECODE = "i"
+
+
+def compile_signal(modulation: int, timings: Iterable[int]) -> array:
+    """Return the raw ``[modulation, high, -low, ...]`` signal as sent to the hub."""
+    signal = array(TYPECODE, (modulation,))
+    signal.extend(timings)
+    return signal
+
+
+def signal_hash(signal: array) -> str:
+    """Return the content hash a signal is stored under."""
+    return hashlib.sha1(signal.tobytes()).hexdigest()[:16]
+
+
+def concatenate_signals(signals: list[array], gap: int) -> array:
+    """Join signals into one, separated by ``gap`` microseconds of silence.
+
+    All signals must use the same carrier frequency. Silence is negative, the
+    gap is added to the trailing silence of a signal or appended if it ends
+    with a pulse.
+    """
+    modulation = signals[0][0]
+    if any(signal[0] != modulation for signal in signals):
+        raise ValueError("IR signals with different carrier frequencies can not be played in one sequence")
+    sequence = array(TYPECODE, (modulation,))
+    for index, signal in enumerate(signals):
+        sequence.extend(signal[1:])
+        if index == len(signals) - 1 or not gap:
+            continue
+        if len(sequence) > 1 and sequence[-1] < 0:
+            sequence[-1] -= gap
+        else:
+            sequence.append(-gap)
+    return sequence
+
+
+class FlicHubIrLibrary:
+    """Keeps precompiled raw IR signals, keyed by content hash and optionally by name.
+
+    Signals are kept as arrays in memory and stored base64 encoded.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.ir_library")
+        self._signals: dict[str, array] = {}
+        self._names: dict[str, str] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored signals."""
+        data = await self._store.async_load() or {}
+        for key, encoded in data.get("signals", {}).items():
+            signal = array(TYPECODE)
+            signal.frombytes(base64.b64decode(encoded))
+            self._signals[key] = signal
+        self._names = data.get("names", {})
+
+    @property
+    def names(self) -> dict[str, str]:
+        """Return the hashes of the named signals."""
+        return dict(self._names)
+
+    @callback
+    def async_add(self, signal: array, name: str | None = None) -> str:
+        """Add a signal, optionally under a name, and return its hash."""
+        key = signal_hash(signal)
+        changed = key not in self._signals
+        self._signals.setdefault(key, signal)
+        if name is not None and self._names.get(name) != key:
+            self._names[name] = key
+            changed = True
+        if changed:
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+        return key
+
+    @callback
+    def async_get(self, name_or_hash: str) -> array | None:
+        """Return a signal by name or hash."""
+        return self._signals.get(self._names.get(name_or_hash, name_or_hash))
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            "signals": {
+                key: base64.b64encode(signal.tobytes()).decode() for key, signal in self._signals.items()
+            },
+            "names": self._names
+        }
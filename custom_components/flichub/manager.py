@@ -0,0 +1,170 @@
+"""Domain wide manager of the Flic Hub connections."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Iterable
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .client import describe_error
+from .const import DOMAIN, RECORDING_MAX_LINES
+from .ir_library import FlicHubIrLibrary
+from .profiler import FlicHubProfiler
+from .recorder import FlicHubRecorder
+from .twist import FlicHubTwistEngine
+
+if TYPE_CHECKING:
+    from . import FlicHubEntryData
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class FlicHubManager:
+    """Owns the clients of all Flic Hub config entries.
+
+    Hubs are resolved by config entry, device or entity. Each of them is a
+    dict lookup, in the device and entity registries for the latter two.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self.entries: dict[str, FlicHubEntryData] = {}
+        self.ir_library = FlicHubIrLibrary(hass)
+        self.twist_engine = FlicHubTwistEngine(hass)
+        self.profiler: FlicHubProfiler | None = None
+
+    @callback
+    def async_add_entry(self, entry_id: str, data: FlicHubEntryData) -> None:
+        """Take ownership of the client of a config entry."""
+        self.entries[entry_id] = data
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> FlicHubEntryData | None:
+        """Release the client of a config entry."""
+        return self.entries.pop(entry_id, None)
+
+    @callback
+    def async_resolve(
+            self,
+            config_entry_ids: Iterable[str] = (),
+            device_ids: Iterable[str] = (),
+            entity_ids: Iterable[str] = ()
+    ) -> dict[str, FlicHubEntryData]:
+        """Return the hubs targeted by config entries, devices and entities, keyed by entry id.
+
+        Without a target the only hub is returned, with several hubs a target is required.
+        """
+        if not config_entry_ids and not device_ids and not entity_ids:
+            if len(self.entries) > 1:
+                raise ServiceValidationError(
+                    f"{len(self.entries)} Flic Hubs are configured, target a hub, one of its devices or entities"
+                )
+            return dict(self.entries)
+
+        targets = set(config_entry_ids)
+        device_registry = dr.async_get(self._hass)
+        for device_id in device_ids:
+            if (device := device_registry.async_get(device_id)) is None:
+                _LOGGER.warning(f"Flic Hub device {device_id} not found")
+                continue
+            targets.update(device.config_entries)
+        entity_registry = er.async_get(self._hass)
+        for entity_id in entity_ids:
+            if (entity := entity_registry.async_get(entity_id)) is None or entity.config_entry_id is None:
+                _LOGGER.warning(f"Flic Hub entity {entity_id} not found")
+                continue
+            targets.add(entity.config_entry_id)
+
+        hubs = {}
+        for entry_id in targets:
+            if entry_id in self.entries:
+                hubs[entry_id] = self.entries[entry_id]
+            elif entry_id in config_entry_ids:
+                _LOGGER.error(f"FlicHub config entry {entry_id} not found.")
+        return hubs
+
+    @callback
+    def async_start_recording(self, entry_id: str, duration: float) -> FlicHubRecorder | None:
+        """Record the lines received from a hub for ``duration`` secs into the config dir."""
+        client = self.entries[entry_id].client
+        if client.recorder is not None:
+            _LOGGER.warning(f"Already recording Flic Hub {entry_id} to {client.recorder.path}")
+            return None
+        path = self._hass.config.path(f"{DOMAIN}_{entry_id}_{dt_util.now():%Y%m%d_%H%M%S}.jsonl.gz")
+        recorder = FlicHubRecorder(path, RECORDING_MAX_LINES)
+
+        async def stop_recording(_now):
+            await self.async_stop_recording(entry_id)
+
+        async def request_buttons():
+            try:
+                await client.get_buttons()
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                _LOGGER.warning(f"Failed to fetch buttons at the start of the recording: {describe_error(e)}")
+
+        recorder.unsub_timer = async_call_later(self._hass, duration, stop_recording)
+        client.recorder = recorder
+        # Start with the buttons of the hub, a replay needs them
+        self._hass.async_create_task(request_buttons())
+        _LOGGER.info(f"Recording Flic Hub {entry_id} to {path} for {duration} secs")
+        return recorder
+
+    async def async_stop_recording(self, entry_id: str) -> FlicHubRecorder | None:
+        """Stop recording a hub and write the recording."""
+        client = self.entries[entry_id].client
+        if (recorder := client.recorder) is None:
+            return None
+        client.recorder = None
+        recorder.unsub_timer()
+        await self._hass.async_add_executor_job(recorder.write)
+        _LOGGER.info(
+            f"Recorded {len(recorder)} lines of Flic Hub {entry_id} to {recorder.path}"
+            f"{f', dropped {recorder.dropped}' if recorder.dropped else ''}"
+        )
+        return recorder
+
+    @callback
+    def async_start_profiling(self, duration: float) -> FlicHubProfiler | None:
+        """Profile the hot callbacks of all hubs for ``duration`` secs into the config dir."""
+        if self.profiler is not None:
+            _LOGGER.warning(f"Already profiling to {self.profiler.path}")
+            return None
+        profiler = FlicHubProfiler(self._hass.config.path(f"{DOMAIN}_profile_{dt_util.now():%Y%m%d_%H%M%S}.prof"))
+
+        async def stop_profiling(_now):
+            await self.async_stop_profiling()
+
+        profiler.unsub_timer = async_call_later(self._hass, duration, stop_profiling)
+        profiler.start()
+        self.profiler = profiler
+        _LOGGER.info(f"Profiling to {profiler.path} for {duration} secs")
+        return profiler
+
+    async def async_stop_profiling(self) -> FlicHubProfiler | None:
+        """Stop profiling and write the stats."""
+        if (profiler := self.profiler) is None:
+            return None
+        self.profiler = None
+        profiler.stop()
+        profiler.unsub_timer()
+        await self._hass.async_add_executor_job(profiler.write)
+        _LOGGER.info(f"Wrote profile to {profiler.path}")
+        return profiler
+
+    @callback
+    def async_stop(self, event: Event | None = None) -> None:
+        """Disconnect all clients and stop the twist controllers."""
+        for entry_id, data in self.entries.items():
+            if data.client.recorder is not None:
+                self._hass.async_create_task(self.async_stop_recording(entry_id))
+            data.sender.async_shutdown()
+            data.client.disconnect()
+        if self.profiler is not None:
+            self._hass.async_create_task(self.async_stop_profiling())
+        self.twist_engine.async_stop()
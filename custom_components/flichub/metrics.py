@@ -0,0 +1,96 @@
+"""Performance counters for Flic Hub."""
+import time
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets in milliseconds, the last bucket is unbounded
+HISTOGRAM_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+RATE_WINDOW = 60.0
+
+
+class Histogram:
+    """Fixed bucket histogram, recording a value is a bisect and a few additions."""
+
+    def __init__(self, buckets: tuple = HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> float | None:
+        """Return the upper bound of the bucket the percentile falls in."""
+        if not self.count:
+            return None
+        rank = percentile / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max,
+            "buckets": dict(zip([*map(str, self.buckets), "inf"], self.counts)),
+        }
+
+
+class FlicHubMetrics:
+    """Counters and histograms of one hub.
+
+    Event rates are counted per type and turned into events per second once
+    per window, so recording an event is a dict update and a clock read.
+    """
+
+    def __init__(self):
+        self.events: dict[str, int] = {}
+        self.event_rates: dict[str, float] = {}
+        self._window_start = time.monotonic()
+        self._window_events: dict[str, int] = {}
+        # From receiving a click to writing the button state
+        self.click_latency = Histogram()
+        # From a raw twist value to the virtual device state write it causes
+        self.twist_latency = Histogram()
+        self.refresh_duration = Histogram()
+
+    def record_event(self, event_type: str) -> None:
+        """Count an event pushed by the hub."""
+        self.events[event_type] = self.events.get(event_type, 0) + 1
+        self._window_events[event_type] = self._window_events.get(event_type, 0) + 1
+        self._roll_window()
+
+    def _roll_window(self) -> None:
+        elapsed = time.monotonic() - self._window_start
+        if elapsed < RATE_WINDOW:
+            return
+        self.event_rates = {event_type: count / elapsed for event_type, count in self._window_events.items()}
+        self._window_events = {}
+        self._window_start += elapsed
+
+    @property
+    def event_rate(self) -> float:
+        """Return the events per second of all types in the last full window."""
+        self._roll_window()
+        return sum(self.event_rates.values())
+
+    def as_dict(self) -> dict:
+        self._roll_window()
+        return {
+            "events": dict(self.events),
+            "event_rates": dict(self.event_rates),
+            "click_latency_ms": self.click_latency.as_dict(),
+            "twist_latency_ms": self.twist_latency.as_dict(),
+            "refresh_duration_ms": self.refresh_duration.as_dict(),
+        }
@@ -0,0 +1,132 @@
+"""Profiling of the hot callbacks of Flic Hub."""
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import functools
+import inspect
+
+# The running profiler, checked on every call of a profiled callback
+_active: FlicHubProfiler | None = None
+
+
+class FlicHubProfiler:
+    """Deterministic profiler that only runs inside the callbacks decorated with ``profiled``.
+
+    The rest of Home Assistant is not profiled, nor is code run in
+    ``outside_profile``. Callbacks running inside other profiled callbacks
+    are part of the outer one, and coroutines are only profiled while they
+    run, not while they await.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.unsub_timer = None
+        self._profile = cProfile.Profile()
+        self._depth = 0
+
+    @property
+    def running(self) -> bool:
+        return _active is self
+
+    def start(self) -> None:
+        global _active
+        _active = self
+
+    def stop(self) -> None:
+        global _active
+        if _active is self:
+            _active = None
+
+    def enter(self) -> None:
+        if self._depth == 0:
+            self._profile.enable()
+        self._depth += 1
+
+    def exit(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self._profile.disable()
+
+    def pause(self) -> int:
+        """Stop profiling inside a profiled callback, returns the depth to resume at."""
+        depth, self._depth = self._depth, 0
+        if depth:
+            self._profile.disable()
+        return depth
+
+    def resume(self, depth: int) -> None:
+        if depth:
+            self._profile.enable()
+        self._depth = depth
+
+    def write(self) -> None:
+        """Write the stats to ``path`` for pstats or snakeviz, this does blocking I/O."""
+        self._profile.dump_stats(self.path)
+
+
+class _ProfiledCoroutine:
+    """Profiles each step of a coroutine between its awaits."""
+
+    def __init__(self, coro):
+        self._coro = coro
+
+    def __await__(self):
+        steps = self._coro.__await__()
+        value, error = None, None
+        while True:
+            profiler = _active
+            if profiler is not None:
+                profiler.enter()
+            try:
+                yielded = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if profiler is not None:
+                    profiler.exit()
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:  # pylint: disable=broad-except
+                value, error = None, e
+
+
+@contextlib.contextmanager
+def outside_profile():
+    """Leave the code run inside out of the profile of the profiled callback around it.
+
+    Used around firing events, whose listeners belong to other integrations
+    and automations. Profiled callbacks called from inside are profiled again.
+    """
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    depth = profiler.pause()
+    try:
+        yield
+    finally:
+        profiler.resume(depth)
+
+
+def profiled(func):
+    """Profile ``func`` while a FlicHubProfiler runs, at the cost of a global lookup otherwise."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if _active is None:
+                return await func(*args, **kwargs)
+            return await _ProfiledCoroutine(func(*args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return func(*args, **kwargs)
+        profiler.enter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.exit()
+    return wrapper
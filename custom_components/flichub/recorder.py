@@ -0,0 +1,59 @@
+"""Recording of the event and command stream of a Flic Hub."""
+import gzip
+import json
+import time
+
+RECORDING_VERSION = 1
+
+
+class FlicHubRecorder:
+    """Keeps the lines received from a hub with the time they arrived.
+
+    Recording a line is a clock read and an append, the lines are only
+    formatted when the recording is written. At most ``max_lines`` are kept,
+    later lines are counted as dropped.
+
+    A recording is a gzipped file of JSON lines: a header followed by one
+    ``[offset_ms, message]`` per received line.
+    """
+
+    def __init__(self, path: str, max_lines: int):
+        self.path = path
+        self.max_lines = max_lines
+        self.started = time.time()
+        self.dropped = 0
+        self.unsub_timer = None
+        self._start = time.monotonic()
+        self._lines: list[tuple[float, bytes]] = []
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def record(self, line: bytes) -> None:
+        if len(self._lines) >= self.max_lines:
+            self.dropped += 1
+            return
+        self._lines.append((time.monotonic(), line))
+
+    def write(self) -> None:
+        """Write the recording to ``path``, this does blocking I/O."""
+        header = {"version": RECORDING_VERSION, "started": self.started, "lines": len(self._lines),
+                  "dropped": self.dropped}
+        with gzip.open(self.path, "wt", encoding="utf-8") as file:
+            file.write(f"{json.dumps(header)}\n")
+            for received, line in self._lines:
+                # The line is the JSON the hub sent, it is embedded as is
+                file.write(f"[{(received - self._start) * 1000:.1f},{line.decode()}]\n")
+
+
+def read_recording(path: str) -> list[tuple[float, dict]]:
+    """Return the messages of a recording with their offset in secs, this does blocking I/O."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header = json.loads(file.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version {header.get('version')} in {path}")
+        records = []
+        for line in file:
+            offset, message = json.loads(line)
+            records.append((offset / 1000, message))
+    return records
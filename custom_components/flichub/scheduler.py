@@ -0,0 +1,122 @@
+"""Outbound command scheduling for Flic Hub."""
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+from .const import PRIORITIES, QUEUE_SIZES
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+@dataclass
+class QueuedCommand:
+    """A command waiting to be written to the hub."""
+
+    message: dict | str
+    enqueued: float
+    hold: float
+
+
+class FlicHubCommandScheduler:
+    """Writes commands to one hub in priority order.
+
+    Commands are written right away unless the transport is paused by
+    backpressure or their priority class is held. A command with a ``hold``
+    keeps its class, e.g. IR, from writing for that many seconds, so a bulk of
+    IR signals is released at the pace the hub plays them while interactive
+    traffic goes out in between.
+
+    Queues are bounded per class. A command with the key of a queued command
+    replaces it, virtual device values are merged with the latest value of
+    every key winning. A command that does not fit is dropped.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, write: Callable[[str], None]):
+        self._loop = loop
+        self._write = write
+        self._paused = False
+        self._queues: dict[str, OrderedDict[Hashable, QueuedCommand]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self._held_until: dict[str, float] = {priority: 0.0 for priority in PRIORITIES}
+        self._timer: asyncio.TimerHandle | None = None
+        self._stats: dict[str, dict[str, float]] = {
+            priority: {"merged": 0, "dropped": 0, "last_wait": 0.0, "max_wait": 0.0} for priority in PRIORITIES
+        }
+
+    @property
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Return queue depth, merge and drop counts and wait times (secs) per priority."""
+        return {
+            priority: {"depth": len(self._queues[priority]), **self._stats[priority]} for priority in PRIORITIES
+        }
+
+    def submit(self, priority: str, message: dict | str, key: Hashable = None, hold: float = 0.0) -> bool:
+        """Queue a command, returns False if it was dropped."""
+        queue = self._queues[priority]
+        if key is not None and key in queue:
+            queued = queue[key]
+            if isinstance(message, dict) and isinstance(queued.message, dict) and "values" in message:
+                message = {**message, "values": {**queued.message.get("values", {}), **message["values"]}}
+            queued.message = message
+            queued.hold = hold
+            self._stats[priority]["merged"] += 1
+            return True
+        if len(queue) >= QUEUE_SIZES[priority]:
+            self._stats[priority]["dropped"] += 1
+            _LOGGER.warning(f"Dropping {priority} command, {len(queue)} commands are already waiting")
+            return False
+        queue[key if key is not None else object()] = QueuedCommand(message, self._loop.time(), hold)
+        self._drain()
+        return True
+
+    def pause(self) -> None:
+        """Stop writing, e.g. while the transport buffer is full."""
+        self._paused = True
+
+    def resume(self) -> None:
+        """Start writing again."""
+        self._paused = False
+        self._drain()
+
+    def clear(self) -> None:
+        """Drop all queued commands, e.g. when the connection is lost."""
+        for priority, queue in self._queues.items():
+            self._stats[priority]["dropped"] += len(queue)
+            queue.clear()
+        self._held_until = {priority: 0.0 for priority in PRIORITIES}
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _drain(self) -> None:
+        """Write queued commands, highest priority first, until paused or all classes are held."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while not self._paused:
+            now = self._loop.time()
+            ready = [
+                priority for priority in PRIORITIES
+                if self._queues[priority] and self._held_until[priority] <= now
+            ]
+            if not ready:
+                break
+            priority = ready[0]
+            _, command = self._queues[priority].popitem(last=False)
+            wait = now - command.enqueued
+            stats = self._stats[priority]
+            stats["last_wait"] = wait
+            stats["max_wait"] = max(stats["max_wait"], wait)
+            if command.hold:
+                self._held_until[priority] = now + command.hold
+            self._write(json.dumps(command.message) if isinstance(command.message, dict) else command.message)
+
+        if self._paused:
+            return
+        held = [self._held_until[priority] for priority in PRIORITIES if self._queues[priority]]
+        if held:
+            self._timer = self._loop.call_at(min(held), self._drain)
@@ -0,0 +1,69 @@
+"""Outbound virtual device updates for Flic Hub."""
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from pyflichub.client import FlicHubTcpClient
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class FlicHubVirtualDeviceSender:
+    """Coalesces virtual device state updates sent to the hub.
+
+    Updates for the same ``(dimmable_type, virtual_device_id)`` are sent at most
+    once per interval. Updates arriving in between are merged into one pending
+    update, the latest value of every key wins, which is flushed when the
+    interval has passed. The final value is therefore always delivered.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: FlicHubTcpClient, max_rate: float):
+        self._hass = hass
+        self._client = client
+        self._interval = 1.0 / max_rate if max_rate else 0.0
+        self._pending: dict[tuple[str, str], dict] = {}
+        self._last_sent: dict[tuple[str, str], float] = {}
+        self._timers: dict[tuple[str, str], asyncio.TimerHandle] = {}
+
+    @callback
+    def async_set_max_rate(self, max_rate: float) -> None:
+        """Change the rate, pending updates are flushed at the rate they were queued with."""
+        self._interval = 1.0 / max_rate if max_rate else 0.0
+
+    @callback
+    def async_send(self, dimmable_type: str, virtual_device_id: str, values: dict) -> None:
+        """Queue a state update, sending it right away if the interval allows it."""
+        key = (dimmable_type, virtual_device_id)
+        if key in self._pending:
+            self._pending[key].update(values)
+        else:
+            self._pending[key] = dict(values)
+
+        if key in self._timers:
+            # A flush is already scheduled and will pick up the merged values
+            return
+
+        delay = self._last_sent.get(key, float("-inf")) + self._interval - self._hass.loop.time()
+        if delay <= 0:
+            self._async_flush(key)
+        else:
+            self._timers[key] = self._hass.loop.call_later(delay, self._async_flush, key)
+
+    @callback
+    def _async_flush(self, key: tuple[str, str]) -> None:
+        self._timers.pop(key, None)
+        values = self._pending.pop(key, None)
+        if values is None:
+            return
+        self._last_sent[key] = self._hass.loop.time()
+        dimmable_type, virtual_device_id = key
+        self._client.send_virtual_device_update_state(dimmable_type, virtual_device_id, values)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Send all pending updates right away."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for key in list(self._pending):
+            self._async_flush(key)
@@ -6,7 +6,8 @@ from homeassistant.helpers.device_registry import format_mac
 
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from homeassistant.const import CONF_IP_ADDRESS, EntityCategory, CONF_NAME, PERCENTAGE
+from homeassistant.const import CONF_IP_ADDRESS, EntityCategory, CONF_NAME, PERCENTAGE, UnitOfTime, Platform
+from homeassistant.core import callback
 
 from homeassistant.components.binary_sensor import ENTITY_ID_FORMAT
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
@@ -23,24 +24,32 @@ _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 async def async_setup_entry(hass, entry, async_add_devices):
     """Setup binary_sensor platform."""
-    data_entry: FlicHubEntryData = hass.data[DOMAIN][entry.entry_id]
+    data_entry: FlicHubEntryData = hass.data[DOMAIN].entries[entry.entry_id]
     buttons = data_entry.coordinator.data[DATA_BUTTONS]
     flic_hub = data_entry.coordinator.data[DATA_HUB]
     devices = []
     for serial_number, button in buttons.items():
         devices.append(FlicHubButtonBatterySensor(data_entry.coordinator, entry, button, flic_hub))
         devices.append(FlicHubButtonBatteryTimestampSensor(data_entry.coordinator, entry, button, flic_hub))
+    devices.append(FlicHubRefreshLatencySensor(data_entry.coordinator, entry, flic_hub))
+    devices.append(FlicHubPollIntervalSensor(data_entry.coordinator, entry, flic_hub))
+    devices.append(FlicHubEventRateSensor(data_entry.coordinator, entry, flic_hub))
+    devices.append(FlicHubClickLatencySensor(data_entry.coordinator, entry, flic_hub))
+    devices.append(FlicHubReconnectsSensor(data_entry.coordinator, entry, flic_hub, data_entry.client))
+    devices.append(FlicHubCommandQueueSensor(data_entry.coordinator, entry, flic_hub, data_entry.client))
     async_add_devices(devices)
 
-    def async_add_button(serial_number):
-        button = data_entry.coordinator.data[DATA_BUTTONS].get(serial_number)
+    @callback
+    def async_add_button(button_id):
+        button = data_entry.coordinator.async_get_button(button_id)
         if button:
             async_add_devices([
                 FlicHubButtonBatterySensor(data_entry.coordinator, entry, button, flic_hub),
                 FlicHubButtonBatteryTimestampSensor(data_entry.coordinator, entry, button, flic_hub)
             ])
 
-    entry.async_on_unload(
+    data_entry.async_on_platform_unload(
+        Platform.SENSOR,
         async_dispatcher_connect(hass, f"{DOMAIN}_{entry.entry_id}_add_button", async_add_button)
     )
 
@@ -51,6 +60,7 @@ class FlicHubButtonBatterySensor(FlicHubButtonEntity, SensorEntity):
     _attr_device_class = SensorDeviceClass.BATTERY
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_state_class = SensorStateClass.MEASUREMENT
+    _button_fields = FlicHubButtonEntity._button_fields | {"battery_status"}
 
     def __init__(self, coordinator, config_entry, button: FlicButton, flic_hub: FlicHubInfo):
         super().__init__(coordinator, config_entry, button.serial_number, flic_hub)
@@ -70,6 +80,7 @@ class FlicHubButtonBatteryTimestampSensor(FlicHubButtonEntity, SensorEntity):
     """flichub binary_sensor class."""
     _attr_device_class = SensorDeviceClass.TIMESTAMP
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _button_fields = FlicHubButtonEntity._button_fields | {"battery_timestamp"}
 
     def __init__(self, coordinator, config_entry, button: FlicButton, flic_hub: FlicHubInfo):
         super().__init__(coordinator, config_entry, button.serial_number, flic_hub)
@@ -88,3 +99,140 @@ class FlicHubButtonBatteryTimestampSensor(FlicHubButtonEntity, SensorEntity):
     def available(self) -> bool:
         """Return True if entity is available."""
         return True
+
+
+class FlicHubDiagnosticSensor(FlicHubEntity, SensorEntity):
+    """Diagnostic sensor of the Flic Hub itself, disabled by default."""
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    @property
+    def device_info(self):
+        """Return device info to attach to the Flic Hub device."""
+        return {
+            "identifiers": {(DOMAIN, self.mac_address)}
+        }
+
+
+class FlicHubRefreshLatencySensor(FlicHubDiagnosticSensor):
+    """flichub sensor class."""
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
+    _attr_name = "Refresh latency"
+
+    def __init__(self, coordinator, config_entry, flic_hub: FlicHubInfo):
+        super().__init__(coordinator, config_entry, flic_hub)
+        self._attr_unique_id = f"{self.mac_address}-refresh_latency"
+
+    @property
+    def native_value(self):
+        """Return the duration of the last refresh in milliseconds."""
+        duration = self.coordinator.last_refresh_duration
+        return round(duration * 1000, 1) if duration is not None else None
+
+
+class FlicHubPollIntervalSensor(FlicHubDiagnosticSensor):
+    """flichub sensor class."""
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_icon = "mdi:timer-sync-outline"
+    _attr_name = "Poll interval"
+
+    def __init__(self, coordinator, config_entry, flic_hub: FlicHubInfo):
+        super().__init__(coordinator, config_entry, flic_hub)
+        self._attr_unique_id = f"{self.mac_address}-poll_interval"
+
+    @property
+    def native_value(self):
+        """Return the current interval between two polls of the hub."""
+        return self.coordinator.update_interval.total_seconds()
+
+
+class FlicHubEventRateSensor(FlicHubDiagnosticSensor):
+    """flichub sensor class."""
+    _attr_native_unit_of_measurement = "events/s"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:chart-line"
+    _attr_name = "Event rate"
+
+    def __init__(self, coordinator, config_entry, flic_hub: FlicHubInfo):
+        super().__init__(coordinator, config_entry, flic_hub)
+        self._attr_unique_id = f"{self.mac_address}-event_rate"
+
+    @property
+    def native_value(self):
+        """Return the events per second pushed by the hub."""
+        return round(self.coordinator.metrics.event_rate, 2)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the events per second per event type."""
+        return {event_type: round(rate, 2) for event_type, rate in self.coordinator.metrics.event_rates.items()}
+
+
+class FlicHubClickLatencySensor(FlicHubDiagnosticSensor):
+    """flichub sensor class."""
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
+    _attr_name = "Click latency"
+
+    def __init__(self, coordinator, config_entry, flic_hub: FlicHubInfo):
+        super().__init__(coordinator, config_entry, flic_hub)
+        self._attr_unique_id = f"{self.mac_address}-click_latency"
+
+    @property
+    def native_value(self):
+        """Return the 95th percentile from receiving a click to writing the button state."""
+        return self.coordinator.metrics.click_latency.percentile(95)
+
+
+class FlicHubReconnectsSensor(FlicHubDiagnosticSensor):
+    """flichub sensor class."""
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:lan-disconnect"
+    _attr_name = "Reconnects"
+
+    def __init__(self, coordinator, config_entry, flic_hub: FlicHubInfo, client):
+        super().__init__(coordinator, config_entry, flic_hub)
+        self.client = client
+        self._attr_unique_id = f"{self.mac_address}-reconnects"
+
+    @property
+    def native_value(self):
+        """Return how often the hub dropped the connection."""
+        return self.client.reconnect_count
+
+    @property
+    def extra_state_attributes(self):
+        """Return the version of the server running on the hub."""
+        return {"server_version": self.coordinator.server_version}
+
+
+class FlicHubCommandQueueSensor(FlicHubDiagnosticSensor):
+    """flichub sensor class."""
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:tray-full"
+    _attr_name = "Command queue"
+
+    def __init__(self, coordinator, config_entry, flic_hub: FlicHubInfo, client):
+        super().__init__(coordinator, config_entry, flic_hub)
+        self.client = client
+        self._attr_unique_id = f"{self.mac_address}-command_queue"
+
+    @property
+    def native_value(self):
+        """Return the number of commands waiting to be written to the hub."""
+        return sum(stats["depth"] for stats in self.client.scheduler.stats.values())
+
+    @property
+    def extra_state_attributes(self):
+        """Return the queue depth and max wait per priority."""
+        return {
+            f"{priority}_{key}": value
+            for priority, stats in self.client.scheduler.stats.items()
+            for key, value in stats.items()
+        }
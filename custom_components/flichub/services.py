@@ -0,0 +1,181 @@
+"""Services for Flic Hub."""
+import logging
+
+import voluptuous as vol
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, RECORDING_DEFAULT_DURATION, RECORDING_MAX_DURATION, PROFILE_DEFAULT_DURATION, \
+    PROFILE_MAX_DURATION
+from .ir_library import compile_signal, concatenate_signals
+from .manager import FlicHubManager
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+SERVICE_SEND_VIRTUAL_DEVICE_UPDATE_STATE = "send_virtual_device_update_state"
+SERVICE_PLAY_IR = "play_ir"
+SERVICE_PLAY_IR_SEQUENCE = "play_ir_sequence"
+SERVICE_SAVE_IR_SIGNAL = "save_ir_signal"
+SERVICE_START_RECORDING = "start_recording"
+SERVICE_STOP_RECORDING = "stop_recording"
+SERVICE_PROFILE = "profile"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+
+TARGET_SCHEMA = {
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_ENTITY_ID): cv.comp_entity_ids,
+}
+
+SEND_VIRTUAL_DEVICE_UPDATE_STATE_SCHEMA = vol.Schema({
+    **TARGET_SCHEMA,
+    vol.Required("dimmable_type"): cv.string,
+    vol.Required("virtual_device_id"): cv.string,
+    vol.Optional("values", default={}): dict,
+})
+
+PLAY_IR_SCHEMA = vol.Schema({
+    **TARGET_SCHEMA,
+    vol.Required("signal_id"): vol.Coerce(int),
+})
+
+PLAY_IR_SEQUENCE_SCHEMA = vol.Schema({
+    **TARGET_SCHEMA,
+    vol.Required("signals"): vol.All(cv.ensure_list, [cv.string], vol.Length(min=1)),
+    vol.Optional("gap", default=100): vol.All(vol.Coerce(int), vol.Range(min=0, max=5000)),
+})
+
+SAVE_IR_SIGNAL_SCHEMA = vol.Schema({
+    vol.Required("name"): cv.string,
+    vol.Required("signal"): vol.All(cv.ensure_list, [vol.Coerce(int)], vol.Length(min=2)),
+})
+
+START_RECORDING_SCHEMA = vol.Schema({
+    **TARGET_SCHEMA,
+    vol.Optional("duration", default=RECORDING_DEFAULT_DURATION): vol.All(
+        vol.Coerce(float), vol.Range(min=1, max=RECORDING_MAX_DURATION)
+    ),
+})
+
+STOP_RECORDING_SCHEMA = vol.Schema(TARGET_SCHEMA)
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional("duration", default=PROFILE_DEFAULT_DURATION): vol.All(
+        vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+    ),
+})
+
+
+@callback
+def async_setup_services(hass: HomeAssistant, manager: FlicHubManager) -> None:
+    """Register the Flic Hub services once for all hubs."""
+
+    @callback
+    def async_resolve_hubs(call: ServiceCall):
+        hubs = manager.async_resolve(
+            call.data.get(ATTR_CONFIG_ENTRY_ID, []),
+            call.data.get(ATTR_DEVICE_ID, []),
+            call.data.get(ATTR_ENTITY_ID, [])
+        )
+        if not hubs:
+            _LOGGER.error(f"No Flic Hub found to call {call.service} on.")
+        return hubs
+
+    @callback
+    def send_virtual_device_update_state(call: ServiceCall):
+        """Service to send virtual device update state to Flic Hub."""
+        for data in async_resolve_hubs(call).values():
+            data.sender.async_send(call.data["dimmable_type"], call.data["virtual_device_id"], call.data["values"])
+
+    @callback
+    def play_ir(call: ServiceCall):
+        """Service to play IR signal via Flic Hub."""
+        for data in async_resolve_hubs(call).values():
+            data.client.play_ir(call.data["signal_id"])
+
+    @callback
+    def play_ir_sequence(call: ServiceCall):
+        """Service to play a sequence of stored IR signals via Flic Hub in one request."""
+        signals = []
+        for name in call.data["signals"]:
+            signal = manager.ir_library.async_get(name)
+            if signal is None:
+                _LOGGER.error(f"IR signal {name} not found.")
+                return
+            signals.append(signal)
+        try:
+            # The gap is given in milliseconds, signals are in microseconds
+            sequence = concatenate_signals(signals, call.data["gap"] * 1000).tolist()
+        except ValueError as e:
+            _LOGGER.error(e)
+            return
+        for data in async_resolve_hubs(call).values():
+            data.client.play_ir_raw(sequence)
+
+    @callback
+    def save_ir_signal(call: ServiceCall):
+        """Service to store a raw IR signal under a name."""
+        modulation, *timings = call.data["signal"]
+        key = manager.ir_library.async_add(compile_signal(modulation, timings), call.data["name"])
+        _LOGGER.debug(f"Stored IR signal {call.data['name']} as {key}")
+
+    @callback
+    def start_recording(call: ServiceCall):
+        """Service to record the events and commands received from Flic Hub into the config dir."""
+        for entry_id in async_resolve_hubs(call):
+            manager.async_start_recording(entry_id, call.data["duration"])
+
+    async def stop_recording(call: ServiceCall):
+        """Service to stop recording Flic Hub and write the recording."""
+        for entry_id in async_resolve_hubs(call):
+            await manager.async_stop_recording(entry_id)
+
+    @callback
+    def profile(call: ServiceCall):
+        """Service to profile the callbacks of Flic Hub and write the stats into the config dir."""
+        manager.async_start_profiling(call.data["duration"])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_VIRTUAL_DEVICE_UPDATE_STATE,
+        send_virtual_device_update_state,
+        schema=SEND_VIRTUAL_DEVICE_UPDATE_STATE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PLAY_IR,
+        play_ir,
+        schema=PLAY_IR_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PLAY_IR_SEQUENCE,
+        play_ir_sequence,
+        schema=PLAY_IR_SEQUENCE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SAVE_IR_SIGNAL,
+        save_ir_signal,
+        schema=SAVE_IR_SIGNAL_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_RECORDING,
+        start_recording,
+        schema=START_RECORDING_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_RECORDING,
+        stop_recording,
+        schema=STOP_RECORDING_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        profile,
+        schema=PROFILE_SCHEMA
+    )
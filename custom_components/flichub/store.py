@@ -0,0 +1,129 @@
+"""Persistent storage for Flic Hub."""
+import logging
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from pyflichub.button import FlicButton
+from pyflichub.flichub import FlicHubInfo
+
+from .const import DOMAIN, DATA_BUTTONS, DATA_HUB
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10
+
+STORE_BUTTONS = "buttons"
+STORE_HUB = "hub"
+STORE_VIRTUAL_DEVICES = "virtual_devices"
+
+
+def _button_to_dict(button: FlicButton) -> dict:
+    data = dict(vars(button))
+    if data.get("battery_timestamp") is not None:
+        data["battery_timestamp"] = data["battery_timestamp"].isoformat()
+    return data
+
+
+def _button_from_dict(data: dict) -> FlicButton:
+    data = dict(data)
+    if data.get("battery_timestamp") is not None:
+        data["battery_timestamp"] = datetime.fromisoformat(data["battery_timestamp"])
+    return FlicButton(**data)
+
+
+def _hub_info_to_dict(hub_info: FlicHubInfo) -> dict:
+    """Convert hub info back to the shape FlicHubInfo is created from."""
+    dhcp = {}
+    wifi_state = None
+    if hub_info.has_wifi():
+        wifi = hub_info.wifi
+        dhcp["wifi"] = {"connected": wifi.connected, "ip": wifi.ip, "mac": wifi.mac}
+        wifi_state = {
+            "state": wifi.state,
+            "ssid": [ord(char) for char in wifi.ssid] if wifi.ssid is not None else None
+        }
+    if hub_info.has_ethernet():
+        ethernet = hub_info.ethernet
+        dhcp["ethernet"] = {"connected": ethernet.connected, "ip": ethernet.ip, "mac": ethernet.mac}
+    return {"dhcp": dhcp, "wifi_state": wifi_state}
+
+
+def _hub_info_from_dict(data: dict) -> FlicHubInfo:
+    return FlicHubInfo(**data)
+
+
+class FlicHubStore:
+    """Keeps the last known state of a Flic Hub between restarts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._data: dict = {}
+        self._virtual_devices: dict[tuple[str, str], dict] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored data."""
+        self._data = await self._store.async_load() or {}
+        self._virtual_devices = {
+            (device["button_id"], device["virtual_device_id"]): device
+            for device in self._data.pop(STORE_VIRTUAL_DEVICES, [])
+        }
+
+    async def async_remove(self) -> None:
+        """Remove the stored data."""
+        await self._store.async_remove()
+
+    @callback
+    def async_get_snapshot(self) -> dict | None:
+        """Return coordinator data restored from the last snapshot, if there is one."""
+        if STORE_BUTTONS not in self._data or not self._data.get(STORE_HUB):
+            return None
+        try:
+            buttons = [_button_from_dict(button) for button in self._data[STORE_BUTTONS]]
+            hub_info = _hub_info_from_dict(self._data[STORE_HUB])
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.warning(f"Ignoring stored snapshot that could not be restored: {e}")
+            return None
+        return {
+            DATA_BUTTONS: {button.serial_number: button for button in buttons},
+            DATA_HUB: hub_info
+        }
+
+    @callback
+    def async_update_snapshot(self, data: dict) -> None:
+        """Schedule a save of the coordinator data if it differs from the stored snapshot."""
+        buttons = [_button_to_dict(button) for button in data[DATA_BUTTONS].values()]
+        hub = _hub_info_to_dict(data[DATA_HUB])
+        if buttons == self._data.get(STORE_BUTTONS) and hub == self._data.get(STORE_HUB):
+            return
+        self._data[STORE_BUTTONS] = buttons
+        self._data[STORE_HUB] = hub
+        self._async_schedule_save()
+
+    @property
+    def virtual_devices(self) -> list[dict]:
+        """Return the discovered virtual devices."""
+        return list(self._virtual_devices.values())
+
+    @callback
+    def async_add_virtual_device(self, device: dict) -> bool:
+        """Add a discovered virtual device, returns False if it is already known."""
+        key = (device["button_id"], device["virtual_device_id"])
+        if key in self._virtual_devices:
+            return False
+        self._virtual_devices[key] = device
+        self._async_schedule_save()
+        return True
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Schedule a delayed save, changes made in the meantime are written together."""
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            **self._data,
+            STORE_VIRTUAL_DEVICES: list(self._virtual_devices.values())
+        }
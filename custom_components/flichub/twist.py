@@ -0,0 +1,164 @@
+"""Shared smoothing engine for Flic Twist virtual devices."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from pyflichub.twist_controller import RateDetentController
+
+from .const import TWIST_TICK_INTERVAL
+from .metrics import Histogram
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class FlicHubTwistEngine:
+    """Advances all active twist controllers on one shared timer.
+
+    A controller is registered when it receives a raw value and released once
+    it stops moving, so idle controllers take no timer at all. The engine only
+    keeps its timer while at least one controller is active.
+    """
+
+    def __init__(self, hass: HomeAssistant, interval: float = TWIST_TICK_INTERVAL):
+        self._hass = hass
+        self.interval = interval
+        self._controllers: dict[FlicHubTwistController, None] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self.ticks = 0
+        self.last_tick_duration = 0.0
+        self.max_tick_duration = 0.0
+
+    @property
+    def stats(self) -> dict:
+        """Return the tick rate, active controllers and per tick cost (secs)."""
+        return {
+            "tick_interval": self.interval,
+            "active_controllers": len(self._controllers),
+            "ticks": self.ticks,
+            "last_tick_duration": self.last_tick_duration,
+            "max_tick_duration": self.max_tick_duration,
+        }
+
+    @callback
+    def async_register(self, controller: FlicHubTwistController) -> None:
+        """Tick a controller until it is idle."""
+        self._controllers[controller] = None
+        if self._timer is None:
+            self._timer = self._hass.loop.call_later(self.interval, self._async_tick)
+
+    @callback
+    def async_unregister(self, controller: FlicHubTwistController) -> None:
+        """Stop ticking a controller."""
+        self._controllers.pop(controller, None)
+        if not self._controllers and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    @callback
+    def async_stop(self) -> None:
+        """Release all controllers and the timer."""
+        for controller in list(self._controllers):
+            controller.stop()
+        self._controllers.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    @callback
+    def _async_tick(self) -> None:
+        start = time.perf_counter()
+        for controller in list(self._controllers):
+            try:
+                controller.tick()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error advancing twist controller")
+            if not controller.moving:
+                # Not moving, the next raw value registers it again
+                controller.release()
+        self.ticks += 1
+        self.last_tick_duration = time.perf_counter() - start
+        self.max_tick_duration = max(self.max_tick_duration, self.last_tick_duration)
+        self._timer = self._hass.loop.call_later(self.interval, self._async_tick) if self._controllers else None
+
+
+class FlicHubTwistController(RateDetentController):
+    """``pyflichub.twist_controller.RateDetentController`` (pyflichub-tcpclient 0.1.19) ticked by a FlicHubTwistEngine.
+
+    The library's ``update_raw`` starts a ``_tick_loop`` task per controller
+    that wakes every ``tickMs`` for as long as the controller exists. Here the
+    engine calls the inherited ``_tick`` instead, and only while the controller
+    moves. The intent logic and ``cfg`` keys are the library's, only the timer
+    handling is local.
+
+    The time from a raw value to the first output change it causes, including
+    the ``on_change_callback``, is recorded in ``latency`` (ms).
+    """
+
+    def __init__(
+            self,
+            engine: FlicHubTwistEngine,
+            cfg: dict | None = None,
+            on_change_callback: Callable[[int | None], None] | None = None,
+            latency: Histogram | None = None
+    ):
+        super().__init__(cfg, on_change_callback)
+        self._engine = engine
+        self.tick_ms = engine.interval * 1000
+        self.latency = latency
+        self._raw_received: float | None = None
+        self._active = False
+
+    @property
+    def active(self) -> bool:
+        """Return True while the engine ticks this controller."""
+        return self._active
+
+    @property
+    def moving(self) -> bool:
+        return self.current_dir != 0 and self.current_speed != 0
+
+    def update_raw(self, raw_in_pct: float) -> dict | None:
+        """Take a raw position and return the resulting intent."""
+        if not isinstance(raw_in_pct, (int, float)):
+            return None
+        if self._raw_received is None:
+            self._raw_received = time.perf_counter()
+        if not self._active and self._running:
+            self._active = True
+            self._engine.async_register(self)
+
+        # Not running as far as the library knows, so it does not start a tick loop
+        running, self._running = self._running, False
+        try:
+            intent = super().update_raw(raw_in_pct)
+        finally:
+            self._running = running
+        if not self.moving:
+            # No output change coming, the next move is timed from its own raw value
+            self._raw_received = None
+        return intent
+
+    def tick(self) -> None:
+        """Step the output one detent in the current direction and speed."""
+        old_out = self.get_actual_out_pct()
+        self._tick()
+        if self.get_actual_out_pct() != old_out:
+            if self.latency is not None and self._raw_received is not None:
+                self.latency.record((time.perf_counter() - self._raw_received) * 1000)
+            self._raw_received = None
+
+    def release(self) -> None:
+        """Stop being ticked until the next raw value."""
+        self._raw_received = None
+        if self._active:
+            self._active = False
+            self._engine.async_unregister(self)
+
+    def stop(self) -> int | None:
+        """Stop for good, e.g. when the entity is removed."""
+        self.release()
+        return super().stop()
@@ -0,0 +1,53 @@
+import os
+import statistics
+
+import pytest
+
+from tests.simulator import FlicHubSimulator, make_button
+
+# Scale the benchmarks up with e.g. FLICHUB_BENCHMARK_EVENTS=20000
+EVENTS = int(os.environ.get("FLICHUB_BENCHMARK_EVENTS", 200))
+BENCHMARK_PROPERTY = "benchmark"
+
+
+@pytest.fixture
+async def simulator(socket_enabled):
+    """Return a running hub simulator with a few buttons."""
+    hub = FlicHubSimulator([make_button(index) for index in range(4)])
+    await hub.start()
+    yield hub
+    await hub.stop()
+
+
+def percentile(values: list[float], percent: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1] if len(values) > 1 else values[0]
+
+
+@pytest.fixture
+def report(record_property):
+    """Return a function recording a benchmark result as test properties.
+
+    The results end up in the junit xml and in the terminal summary.
+    """
+    def _report(name: str, rows: dict) -> None:
+        record_property(BENCHMARK_PROPERTY, name)
+        for key, value in rows.items():
+            record_property(key, value)
+    return _report
+
+
+def pytest_terminal_summary(terminalreporter):
+    results = [
+        report.user_properties for report in terminalreporter.stats.get("passed", [])
+        if report.when == "call" and report.user_properties
+        and report.user_properties[0][0] == BENCHMARK_PROPERTY
+    ]
+    if not results:
+        return
+    terminalreporter.section("flichub benchmarks")
+    for (_, name), *rows in results:
+        terminalreporter.write_line(name)
+        for key, value in rows:
+            terminalreporter.write_line(
+                f"  {key:<28} {value:>12.3f}" if isinstance(value, float) else f"  {key:<28} {value:>12}"
+            )
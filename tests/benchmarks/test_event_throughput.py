@@ -0,0 +1,110 @@
+"""Event pipeline benchmarks against the hub simulator."""
+import asyncio
+import time
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant, callback
+
+from custom_components.flichub.const import DATA_VIRTUAL_DEVICES, DOMAIN
+from tests.simulator import button_added_event, click_event, connection_event, make_button, twist_event
+from .conftest import EVENTS, percentile
+
+
+async def async_wait_for_events(hass: HomeAssistant, entry, event_type: str, count: int) -> None:
+    metrics = hass.data[DOMAIN].entries[entry.entry_id].coordinator.metrics
+    async with asyncio.timeout(30):
+        while metrics.events.get(event_type, 0) < count:
+            await asyncio.sleep(0.001)
+    await hass.async_block_till_done()
+
+
+def capture_state_writes(hass: HomeAssistant, entity_id: str) -> list[float]:
+    written = []
+
+    @callback
+    def state_changed(event):
+        if event.data["entity_id"] == entity_id:
+            written.append(time.perf_counter())
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, state_changed)
+    return written
+
+
+async def test_click_throughput_and_latency(hass: HomeAssistant, simulator, setup_hub, report):
+    """Measure clicks handled per second and click to state latency."""
+    entry = await setup_hub(simulator)
+    button = simulator.buttons[0]
+    written = capture_state_writes(hass, "binary_sensor.button_0")
+    clicks = [click_event(button, "down" if index % 2 == 0 else "up") for index in range(EVENTS)]
+
+    # As fast as possible
+    start, cpu = time.perf_counter(), time.process_time()
+    await simulator.replay(clicks)
+    await async_wait_for_events(hass, entry, "button", EVENTS)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+    assert len(written) == EVENTS
+
+    # Paced, so the latency is not dominated by queueing
+    written.clear()
+    simulator.sent_at.clear()
+    await simulator.replay(clicks, rate=200)
+    await async_wait_for_events(hass, entry, "button", 2 * EVENTS)
+    latencies = [(write - sent) * 1000 for sent, write in zip(simulator.sent_at, written)]
+    assert len(latencies) == EVENTS
+
+    report("Clicks", {
+        "events": EVENTS,
+        "events/s": EVENTS / elapsed,
+        "cpu/event (ms, incl. hub)": cpu / EVENTS * 1000,
+        "click to state p50 (ms)": percentile(latencies, 50),
+        "click to state p99 (ms)": percentile(latencies, 99),
+    })
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_twist_flood(hass: HomeAssistant, simulator, setup_hub, report):
+    """Measure virtual device updates handled per second and the state writes they cause."""
+    button = simulator.buttons[0]
+    entry = await setup_hub(simulator, data={
+        DATA_VIRTUAL_DEVICES: [{"button_id": button["bdaddr"], "virtual_device_id": "Light", "dimmable_type": "Light"}]
+    })
+    written = capture_state_writes(hass, "light.button_0_light")
+    updates = [
+        twist_event(button, "Light", "Light", {"hue": index % 100 / 100, "saturation": 1.0, "is_on": True})
+        for index in range(EVENTS)
+    ]
+
+    start, cpu = time.perf_counter(), time.process_time()
+    await simulator.replay(updates)
+    await async_wait_for_events(hass, entry, "virtualDeviceUpdate", EVENTS)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+
+    report("Twist flood", {
+        "events": EVENTS,
+        "events/s": EVENTS / elapsed,
+        "cpu/event (ms, incl. hub)": cpu / EVENTS * 1000,
+        "state writes": len(written),
+    })
+    assert 0 < len(written) <= EVENTS
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_connection_churn(hass: HomeAssistant, simulator, setup_hub, report):
+    """Measure connect, disconnect and button added events handled per second."""
+    entry = await setup_hub(simulator)
+    buttons = list(simulator.buttons)
+    stream = [connection_event(buttons[index % len(buttons)], index % 2 == 1) for index in range(EVENTS)]
+    stream.append(button_added_event(make_button(len(buttons))))
+
+    start, cpu = time.perf_counter(), time.process_time()
+    await simulator.replay(stream)
+    await async_wait_for_events(hass, entry, "buttonAdded", 1)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+
+    report("Connection churn", {
+        "events": len(stream),
+        "events/s": len(stream) / elapsed,
+        "cpu/event (ms, incl. hub)": cpu / len(stream) * 1000,
+    })
+    assert hass.states.get(f"binary_sensor.button_{len(buttons)}") is not None
+    await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,75 @@
+"""Replay a recorded event stream against the hub simulator."""
+import asyncio
+import os
+import time
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant, callback
+
+from custom_components.flichub.const import DOMAIN
+from custom_components.flichub.recorder import read_recording
+from tests.simulator import buttons_from_recording, click_event, connection_event, make_button, twist_event
+from .conftest import EVENTS
+
+# A recording made with the flichub.start_recording service, a synthetic one is used if unset
+RECORDING = os.environ.get("FLICHUB_BENCHMARK_RECORDING")
+# Times real speed, e.g. 1 to replay at the recorded pace, as fast as possible if unset
+SPEED = float(os.environ["FLICHUB_BENCHMARK_REPLAY_SPEED"]) if "FLICHUB_BENCHMARK_REPLAY_SPEED" in os.environ else None
+
+
+def synthetic_recording() -> list[tuple[float, dict]]:
+    """Return clicks, twists and connection changes of a few buttons, 5 ms apart."""
+    buttons = [make_button(index) for index in range(4)]
+    records = [(0.0, {"command": "buttons", "data": buttons})]
+    for index in range(EVENTS):
+        button = buttons[index % len(buttons)]
+        if index % 3 == 0:
+            event = click_event(button, "down" if index % 2 == 0 else "up")
+        elif index % 3 == 1:
+            event = twist_event(button, "Light", "Light", {"hue": index % 100 / 100, "saturation": 1.0, "is_on": True})
+        else:
+            event = connection_event(button, index % 2 == 0)
+        records.append(((index + 1) * 0.005, event))
+    return records
+
+
+async def test_replay(hass: HomeAssistant, simulator, setup_hub, report):
+    """Measure the CPU time and state writes of handling a recorded event stream."""
+    if RECORDING:
+        records = await hass.async_add_executor_job(read_recording, RECORDING)
+    else:
+        records = synthetic_recording()
+    simulator.buttons = buttons_from_recording(records)
+    events = sum(1 for _, message in records if "event" in message)
+    entry = await setup_hub(simulator)
+    metrics = hass.data[DOMAIN].entries[entry.entry_id].coordinator.metrics
+
+    state_writes = 0
+
+    @callback
+    def state_changed(_event):
+        nonlocal state_writes
+        state_writes += 1
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, state_changed)
+
+    start, cpu = time.perf_counter(), time.process_time()
+    await simulator.replay_recording(records, SPEED)
+    async with asyncio.timeout(60 + (records[-1][0] / SPEED if SPEED else 0)):
+        while sum(metrics.events.values()) < events:
+            await asyncio.sleep(0.001)
+    await hass.async_block_till_done()
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+
+    report(f"Replay of {RECORDING or 'synthetic recording'}", {
+        "messages": len(records),
+        "events": events,
+        "recorded duration (s)": records[-1][0],
+        "replay duration (s)": elapsed,
+        "cpu (ms, incl. hub)": cpu * 1000,
+        "cpu/event (ms, incl. hub)": cpu / events * 1000,
+        "state writes": state_writes,
+        "state writes/event": state_writes / events,
+        **{f"{event_type} events": count for event_type, count in metrics.events.items()},
+    })
+    await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,97 @@
+"""Startup benchmark for large button fleets."""
+import functools
+import os
+import sys
+import time
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from homeassistant.config_entries import ConfigEntries
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+from custom_components.flichub.client import FlicHubClient
+from custom_components.flichub.const import DATA_VIRTUAL_DEVICES, DOMAIN
+from custom_components.flichub.coordinator import FlicHubDataUpdateCoordinator
+from tests.simulator import make_button
+
+# Run the big sites with e.g. FLICHUB_BENCHMARK_FLEETS=50,500,2000
+FLEETS = [int(size) for size in os.environ.get("FLICHUB_BENCHMARK_FLEETS", "50").split(",")]
+# One virtual light, cover and media player for every this many buttons
+VIRTUAL_DEVICE_EVERY = 10
+
+
+class PhaseRecorder:
+    """Records wall time, allocated blocks and peak traced memory of setup phases.
+
+    Phases are expected to run one after the other, except the platforms which
+    are set up concurrently and only get their wall time recorded.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, dict] = {}
+
+    def measure(self, name: str, func, memory: bool = True):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if memory:
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+                blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                phase = {"wall (ms)": (time.perf_counter() - start) * 1000}
+                if memory:
+                    phase["allocated blocks"] = sys.getallocatedblocks() - blocks
+                    phase["peak (KiB)"] = (tracemalloc.get_traced_memory()[1] - current) / 1024
+                self.phases[name] = phase
+        return wrapper
+
+
+@pytest.mark.parametrize("buttons", FLEETS)
+async def test_startup(hass: HomeAssistant, simulator, buttons: int, setup_hub, report):
+    """Measure the phases of setting up a hub with a fleet of buttons and virtual devices."""
+    simulator.buttons = [make_button(index) for index in range(buttons)]
+    virtual_devices = [
+        {"button_id": button["bdaddr"], "virtual_device_id": f"{dimmable_type} {index}", "dimmable_type": dimmable_type}
+        for index, button in enumerate(simulator.buttons[::VIRTUAL_DEVICE_EVERY])
+        for dimmable_type in ("Light", "Blind", "Speaker")
+    ]
+    recorder = PhaseRecorder()
+
+    def platform_setup(func):
+        @functools.wraps(func)
+        async def wrapper(platform, config_entry):
+            return await recorder.measure(f"platform {platform.domain}", func, memory=False)(platform, config_entry)
+        return wrapper
+
+    tracemalloc.start()
+    try:
+        with patch.object(FlicHubClient, "async_connect",
+                          recorder.measure("connect", FlicHubClient.async_connect)), \
+                patch.object(FlicHubDataUpdateCoordinator, "async_config_entry_first_refresh",
+                             recorder.measure("first refresh",
+                                              FlicHubDataUpdateCoordinator.async_config_entry_first_refresh)), \
+                patch.object(ConfigEntries, "async_forward_entry_setups",
+                             recorder.measure("platforms", ConfigEntries.async_forward_entry_setups)), \
+                patch.object(EntityPlatform, "async_setup_entry", platform_setup(EntityPlatform.async_setup_entry)):
+            start = time.perf_counter()
+            tracemalloc.reset_peak()
+            entry = await setup_hub(simulator, data={DATA_VIRTUAL_DEVICES: virtual_devices})
+            total = (time.perf_counter() - start) * 1000
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+    assert len(hass.data[DOMAIN].entries[entry.entry_id].coordinator.data["buttons"]) == buttons
+    rows = {"buttons": buttons, "virtual devices": len(virtual_devices), "total wall (ms)": total,
+            "total peak (KiB)": peak}
+    for name, phase in recorder.phases.items():
+        for key, value in phase.items():
+            rows[f"{name} {key}"] = float(value) if not isinstance(value, int) else value
+    report(f"Startup with {buttons} buttons", rows)
+
+    await hass.config_entries.async_unload(entry.entry_id)
@@ -1,6 +1,28 @@
 import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.flichub.const import DOMAIN
+from tests.simulator import HOST, FlicHubSimulator
 
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
     """Enable custom integrations in testing."""
     yield
+
+
+@pytest.fixture
+def setup_hub(hass):
+    """Return a function that sets up a config entry connected to a hub simulator."""
+    async def _setup_hub(simulator: FlicHubSimulator, data: dict | None = None,
+                         options: dict | None = None) -> MockConfigEntry:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title="Flic Hub",
+            data={"ip_address": HOST, "port": simulator.port, **(data or {})},
+            options=options or {},
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        return entry
+    return _setup_hub
@@ -0,0 +1,170 @@
+"""Local stand-in for the TCP server running on a Flic Hub."""
+import asyncio
+import json
+import time
+from typing import Iterable
+
+from custom_components.flichub.const import REQUIRED_SERVER_VERSION
+
+HOST = "127.0.0.1"
+MAC_ADDRESS = "11:22:33:44:55:66"
+
+
+def make_button(index: int) -> dict:
+    """Return a button in the shape the hub sends it."""
+    return {
+        "bdaddr": f"90:88:a9:{index >> 16 & 0xff:02x}:{index >> 8 & 0xff:02x}:{index & 0xff:02x}",
+        "serialNumber": f"BA12-{index:06d}",
+        "color": "white",
+        "name": f"Button {index}",
+        "activeDisconnect": False,
+        "connected": True,
+        "ready": True,
+        "batteryStatus": 90,
+        "uuid": f"uuid-{index}",
+        "flicVersion": 2,
+        "firmwareVersion": 10,
+        "key": f"key-{index}",
+        "passiveMode": False,
+        "batteryTimestamp": 1767261600000,
+    }
+
+
+def click_event(button: dict, action: str, button_number: int | None = None) -> dict:
+    return {"event": "button", "button": button["bdaddr"], "action": action, "button_number": button_number}
+
+
+def twist_event(button: dict, virtual_device_id: str, dimmable_type: str, values: dict) -> dict:
+    return {
+        "event": "virtualDeviceUpdate",
+        "meta_data": {
+            "button_id": button["bdaddr"],
+            "virtual_device_id": virtual_device_id,
+            "dimmable_type": dimmable_type,
+        },
+        "values": values,
+    }
+
+
+def button_added_event(button: dict) -> dict:
+    """Return an event adding ``button`` to the simulated hub."""
+    return {"event": "buttonAdded", "button": button["bdaddr"], "added": button}
+
+
+def buttons_from_recording(records: list[tuple[float, dict]]) -> list[dict]:
+    """Return the buttons of the first buttons reply in a recording."""
+    for _, message in records:
+        if message.get("command") == "buttons" and message.get("data") is not None:
+            return message["data"]
+    return []
+
+
+def connection_event(button: dict, connected: bool) -> dict:
+    return {"event": "buttonConnected" if connected else "buttonDisconnected", "button": button["bdaddr"]}
+
+
+class FlicHubSimulator:
+    """Speaks the line based JSON protocol of the hub to ``FlicHubTcpClient``.
+
+    Requests are answered from ``buttons``, events are written to every
+    connected client, either one by one or replayed from a stream.
+    """
+
+    def __init__(self, buttons: list[dict], version: str = REQUIRED_SERVER_VERSION):
+        self.buttons = buttons
+        self.version = version
+        self.received: list[str] = []
+        self.sent_at: list[float] = []
+        self._server: asyncio.AbstractServer | None = None
+        self._writers: list[asyncio.StreamWriter] = []
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> int:
+        """Start listening on a free local port and return it."""
+        self._server = await asyncio.start_server(self._handle_client, HOST, 0)
+        return self.port
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self) -> None:
+        """Close the connections like a hub that reboots."""
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+
+    async def wait_for_client(self) -> None:
+        while not self._writers:
+            await asyncio.sleep(0.01)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.append(writer)
+        while line := await reader.readline():
+            line = line.decode().strip()
+            if not line:
+                continue
+            self.received.append(line)
+            reply = self._reply(line)
+            if reply is not None:
+                writer.write(f"{json.dumps(reply)}\n".encode())
+
+    def _reply(self, line: str) -> dict | None:
+        if line == "buttons":
+            return {"command": "buttons", "data": self.buttons}
+        if line == "server":
+            return {"command": "server", "data": {"version": self.version}}
+        if line == "network":
+            return {
+                "command": "network",
+                "data": {
+                    "dhcp": {"wifi": {"connected": True, "ip": HOST, "mac": MAC_ADDRESS}},
+                    "wifiState": {"state": "connected", "ssid": [ord(char) for char in "home"]},
+                },
+            }
+        # virtualDeviceUpdateState and IR are not answered by the hub
+        return None
+
+    def send(self, event: dict) -> None:
+        """Write an event to all clients, remembering when it was sent."""
+        if "added" in event:
+            self.buttons.append(event["added"])
+            event = {key: value for key, value in event.items() if key != "added"}
+        payload = f"{json.dumps(event)}\n".encode()
+        self.sent_at.append(time.perf_counter())
+        for writer in self._writers:
+            writer.write(payload)
+
+    async def replay(self, events: Iterable[dict], rate: float | None = None) -> None:
+        """Send a stream of events, ``rate`` events per second or as fast as possible."""
+        interval = 1 / rate if rate else 0
+        start = time.perf_counter()
+        for index, event in enumerate(events):
+            if interval:
+                delay = start + index * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self.send(event)
+            if not interval:
+                # Let the transport flush and the client read
+                await asyncio.sleep(0)
+        for writer in self._writers:
+            await writer.drain()
+
+    async def replay_recording(self, records: list[tuple[float, dict]], speed: float | None = None) -> None:
+        """Send the messages of a recording at ``speed`` times real speed or as fast as possible."""
+        start = time.perf_counter()
+        for offset, message in records:
+            if speed:
+                delay = start + offset / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self.send(message)
+            if not speed:
+                await asyncio.sleep(0)
+        for writer in self._writers:
+            await writer.drain()
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.flichub.client import FlicHubClient
+from custom_components.flichub.const import RECONNECT_MAX_DELAY
+
+
+async def test_reconnect_backs_off_exponentially(hass: HomeAssistant):
+    """Test that failed connects are retried with a growing, capped delay."""
+    client = FlicHubClient("127.0.0.1", 1234, hass.loop)
+    attempts = 0
+
+    async def create_connection(*args):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 10:
+            # Stop retrying
+            client._forced_disconnect = True
+        raise OSError("Connection refused")
+
+    sleep = AsyncMock()
+    with patch.object(hass.loop, "create_connection", create_connection), \
+            patch("custom_components.flichub.client.asyncio.sleep", sleep), \
+            patch("custom_components.flichub.client.random.uniform", return_value=1.0):
+        await client.async_connect()
+
+    delays = [args.args[0] for args in sleep.call_args_list]
+    assert delays == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, RECONNECT_MAX_DELAY, RECONNECT_MAX_DELAY,
+                      RECONNECT_MAX_DELAY, RECONNECT_MAX_DELAY]
+
+
+async def test_connection_lost_notifies_disconnect(hass: HomeAssistant):
+    """Test that a dropped connection is reported and a reconnect is started."""
+    client = FlicHubClient("127.0.0.1", 1234, hass.loop)
+    client.async_on_disconnected = AsyncMock()
+    client._transport = MagicMock()
+
+    with patch.object(client, "_async_connect", AsyncMock()) as connect:
+        client.connection_lost(None)
+        await asyncio.sleep(0)
+
+    assert client.reconnect_count == 1
+    client.async_on_disconnected.assert_awaited_once()
+    connect.assert_awaited_once()
+
+    # A disconnect we asked for is not counted as a drop
+    client.async_on_disconnected.reset_mock()
+    client.disconnect()
+    client.connection_lost(None)
+    await asyncio.sleep(0)
+    assert client.reconnect_count == 1
+    client.async_on_disconnected.assert_awaited_once()
+
+
+def reply(client, command, data):
+    client.data_received(f"{json.dumps({'command': command, 'data': data})}\n".encode())
+
+
+async def test_requests_are_pipelined(hass: HomeAssistant):
+    """Test that requests are outstanding together and replies may come back in any order."""
+    client = FlicHubClient("127.0.0.1", 1234, hass.loop)
+    client._transport = MagicMock()
+
+    buttons = [asyncio.ensure_future(client.get_buttons()) for _ in range(2)]
+    server_info = asyncio.ensure_future(client.get_server_info())
+    await asyncio.sleep(0)
+
+    # The same command in flight is only sent once
+    assert [args.args[0] for args in client._transport.write.call_args_list] == [b"buttons\n", b"server\n"]
+
+    reply(client, "server", {"version": "0.1.13"})
+    assert (await server_info).version == "0.1.13"
+    assert not any(request.done() for request in buttons)
+
+    reply(client, "buttons", [])
+    assert await asyncio.gather(*buttons) == [[], []]
+
+
+async def test_request_times_out_on_its_own(hass: HomeAssistant):
+    """Test that a request without a reply times out without affecting other requests."""
+    client = FlicHubClient("127.0.0.1", 1234, hass.loop)
+    client._transport = MagicMock()
+
+    slow = asyncio.ensure_future(client._async_send_command_and_wait_for_data("network", timeout=0.01))
+    fast = asyncio.ensure_future(client.get_server_info())
+    await asyncio.sleep(0)
+    reply(client, "server", {"version": "0.1.13"})
+
+    assert (await fast).version == "0.1.13"
+    with pytest.raises(asyncio.TimeoutError):
+        await slow
+
+    # Nobody waits for the reply any more, the next request sends the command again
+    client._transport.write.reset_mock()
+    request = asyncio.ensure_future(client.get_hubinfo())
+    await asyncio.sleep(0)
+    client._transport.write.assert_called_once_with(b"network\n")
+
+    with patch.object(client, "_async_connect", AsyncMock()):
+        client.connection_lost(None)
+        with pytest.raises(ConnectionError):
+            await request
+
+
+async def test_button_added_is_left_to_the_event_callback(hass: HomeAssistant):
+    """Test that an added button does not start a request of the library that nobody awaits."""
+    event_callback = MagicMock()
+    client = FlicHubClient("127.0.0.1", 1234, hass.loop, event_callback=event_callback)
+    client._transport = MagicMock()
+
+    client.data_received(f"{json.dumps({'event': 'buttonAdded', 'button': '90:88:a9:00:00:01'})}\n".encode())
+    await asyncio.sleep(0)
+
+    client._transport.write.assert_not_called()
+    button, event = event_callback.call_args.args
+    assert button is None
+    assert event.event == "buttonAdded"
@@ -1,24 +1,33 @@
 import pytest
 import asyncio
+from datetime import timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
+from homeassistant.components import automation
+from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntryState
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import DATA_DISPATCHER
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_capture_events, async_mock_service
 
-from custom_components.flichub.const import DOMAIN, DATA_VIRTUAL_DEVICES
+from custom_components.flichub.const import DOMAIN, DATA_HUB, DATA_VIRTUAL_DEVICES, EVENT_CLICK, \
+    DEFAULT_SCAN_INTERVAL, REQUIRED_SERVER_VERSION
+from custom_components.flichub.entity import FlicHubButtonEntity
+from pyflichub.button import FlicButton
 from pyflichub.event import Event
+from pyflichub.flichub import FlicHubInfo
 
 @pytest.fixture
 def mock_flichub_client():
-    with patch("custom_components.flichub.FlicHubTcpClient") as mock_client:
+    with patch("custom_components.flichub.FlicHubClient") as mock_client:
         client_instance = mock_client.return_value
         client_instance.get_server_info = AsyncMock()
         client_instance.get_buttons = AsyncMock(return_value=[])
-        hub_info = MagicMock()
-        hub_info.has_wifi.return_value = True
-        hub_info.wifi.ip = "192.168.1.64"
-        hub_info.wifi.mac = "11:22:33:44:55:66"
-        hub_info.has_ethernet.return_value = False
+        hub_info = FlicHubInfo(
+            dhcp={"wifi": {"connected": True, "ip": "192.168.1.64", "mac": "11:22:33:44:55:66"}},
+            wifi_state={"state": "connected", "ssid": [ord(char) for char in "home"]}
+        )
         client_instance.get_hubinfo = AsyncMock(return_value=hub_info)
         client_instance.async_connect = AsyncMock()
         client_instance.disconnect = MagicMock()
@@ -46,7 +55,7 @@ async def test_virtual_device_update_does_not_reload(hass: HomeAssistant, mock_f
     assert config_entry.state == ConfigEntryState.LOADED
 
     # Get the client instance to simulate an event
-    data_entry = hass.data[DOMAIN][config_entry.entry_id]
+    data_entry = hass.data[DOMAIN].entries[config_entry.entry_id]
 
     # Check that our update listener is set
     assert data_entry.unsub_update_listener is not None
@@ -71,19 +80,655 @@ async def test_virtual_device_update_does_not_reload(hass: HomeAssistant, mock_f
 
         # Get the callback that was attached to the mocked client
         import sys
-        flichub_client_mock_class = sys.modules['custom_components.flichub'].FlicHubTcpClient
+        flichub_client_mock_class = sys.modules['custom_components.flichub'].FlicHubClient
         on_event = flichub_client_mock_class.call_args.kwargs.get("event_callback")
 
         on_event(None, event)
         await hass.async_block_till_done()
 
-        # Config entry data should be updated with the virtual device
-        assert DATA_VIRTUAL_DEVICES in config_entry.data
-        assert len(config_entry.data[DATA_VIRTUAL_DEVICES]) == 1
-        assert config_entry.data[DATA_VIRTUAL_DEVICES][0]["virtual_device_id"] == "Virtual Light"
+        # The virtual device is kept in the store, the config entry is left untouched
+        assert DATA_VIRTUAL_DEVICES not in config_entry.data
+        assert len(data_entry.store.virtual_devices) == 1
+        assert data_entry.store.virtual_devices[0]["virtual_device_id"] == "Virtual Light"
 
-        # The reload method should NOT have been called due to our fix
+        # The same device again is not added twice
+        on_event(None, event)
+        await hass.async_block_till_done()
+        assert len(data_entry.store.virtual_devices) == 1
+
+        # The reload method should NOT have been called
         mock_reload.assert_not_called()
 
-        # Data entry listener should be re-subscribed
-        assert data_entry.unsub_update_listener is not None
+
+async def test_click_is_dispatched_to_button_entity(hass: HomeAssistant, mock_flichub_client):
+    """Test that a click only reaches the binary sensor of the clicked button."""
+    mock_flichub_client.get_buttons.return_value = [
+        FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                   active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                   flic_version=2, firmware_version=10, key="key-1", passive_mode=False),
+        FlicButton(bdaddr="90:88:a9:5b:12:90", serial_number="BA12-A34568", color="black", name="Hallway",
+                   active_disconnect=False, connected=True, ready=True, battery_status=80, uuid="uuid-2",
+                   flic_version=2, firmware_version=10, key="key-2", passive_mode=False),
+    ]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    clicks = async_capture_events(hass, EVENT_CLICK)
+
+    import sys
+    flichub_client_mock_class = sys.modules['custom_components.flichub'].FlicHubClient
+    on_event = flichub_client_mock_class.call_args.kwargs.get("event_callback")
+
+    button = mock_flichub_client.get_buttons.return_value[0]
+    on_event(button, Event("button", button=button.bdaddr, action="down"))
+    await hass.async_block_till_done()
+
+    assert len(clicks) == 1
+    assert clicks[0].data["serial_number"] == "BA12-A34567"
+    assert hass.states.get("binary_sensor.kitchen").state == "on"
+    assert hass.states.get("binary_sensor.hallway").state == "off"
+
+
+async def test_virtual_device_update_is_routed_to_entity(hass: HomeAssistant, mock_flichub_client):
+    """Test that a virtual device update reaches the entity it addresses."""
+    button = FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                        active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                        flic_version=3, firmware_version=10, key="key-1", passive_mode=False)
+    mock_flichub_client.get_buttons.return_value = [button]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={
+            "ip_address": "192.168.1.64",
+            "port": "8124",
+            DATA_VIRTUAL_DEVICES: [
+                {"button_id": button.bdaddr, "virtual_device_id": "Virtual Light", "dimmable_type": "Light"},
+                {"button_id": button.bdaddr, "virtual_device_id": "Other Light", "dimmable_type": "Light"},
+            ]
+        },
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    # Virtual devices kept in the config entry are moved to the store
+    assert DATA_VIRTUAL_DEVICES not in config_entry.data
+    assert len(hass.data[DOMAIN].entries[config_entry.entry_id].store.virtual_devices) == 2
+
+    import sys
+    flichub_client_mock_class = sys.modules['custom_components.flichub'].FlicHubClient
+    on_event = flichub_client_mock_class.call_args.kwargs.get("event_callback")
+
+    event = Event("virtualDeviceUpdate")
+    event.meta_data = {"button_id": button.bdaddr, "virtual_device_id": "Virtual Light", "dimmable_type": "Light"}
+    event.values = {"hue": 0.5, "saturation": 1.0, "is_on": True}
+    on_event(button, event)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("light.kitchen_virtual_light").attributes["hs_color"] == (180.0, 100.0)
+    assert hass.states.get("light.kitchen_other_light").attributes.get("hs_color") is None
+
+
+async def test_twist_updates_only_write_changed_state(hass: HomeAssistant, mock_flichub_client):
+    """Test that virtual device updates write state only when the visible state changes."""
+    button = FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                        active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                        flic_version=3, firmware_version=10, key="key-1", passive_mode=False)
+    mock_flichub_client.get_buttons.return_value = [button]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={
+            "ip_address": "192.168.1.64",
+            "port": "8124",
+            DATA_VIRTUAL_DEVICES: [
+                {"button_id": button.bdaddr, "virtual_device_id": "Light", "dimmable_type": "Light"},
+                {"button_id": button.bdaddr, "virtual_device_id": "Shade", "dimmable_type": "Blind"},
+            ]
+        },
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    import sys
+    flichub_client_mock_class = sys.modules['custom_components.flichub'].FlicHubClient
+    on_event = flichub_client_mock_class.call_args.kwargs.get("event_callback")
+
+    def twist(virtual_device_id, dimmable_type, values):
+        event = Event("virtualDeviceUpdate")
+        event.meta_data = {"button_id": button.bdaddr, "virtual_device_id": virtual_device_id,
+                           "dimmable_type": dimmable_type}
+        event.values = values
+        on_event(button, event)
+
+    state_changes = async_capture_events(hass, EVENT_STATE_CHANGED)
+
+    twist("Light", "Light", {"hue": 0.5, "saturation": 1.0, "is_on": True})
+    await hass.async_block_till_done()
+    assert [event.data["entity_id"] for event in state_changes] == ["light.kitchen_light"]
+
+    # The same values again and raw positions the controller has not moved for yet
+    state_changes.clear()
+    twist("Light", "Light", {"hue": 0.5, "saturation": 1.0, "is_on": True})
+    twist("Light", "Light", {"brightness": 0.5})
+    twist("Shade", "Blind", {"position": 0.5})
+    await hass.async_block_till_done()
+    assert state_changes == []
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_buttons_are_found_by_serial_number_or_bluetooth_address(hass: HomeAssistant, mock_flichub_client):
+    """Test the bluetooth address index of the coordinator, also when the set of buttons changes."""
+    def make_button(serial_number, bdaddr, name):
+        return FlicButton(bdaddr=bdaddr, serial_number=serial_number, color="white", name=name,
+                          active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                          flic_version=2, firmware_version=10, key="key-1", passive_mode=False)
+
+    kitchen = make_button("BA12-A34567", "90:88:a9:5b:12:89", "Kitchen")
+    hall = make_button("BA12-B76543", "90:88:a9:5b:12:90", "Hall")
+    mock_flichub_client.get_buttons.return_value = [kitchen]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN].entries[config_entry.entry_id].coordinator
+
+    assert coordinator.async_get_button(kitchen.serial_number) is kitchen
+    assert coordinator.async_get_button(kitchen.bdaddr) is kitchen
+    assert coordinator.async_get_button(hall.bdaddr) is None
+    assert coordinator.async_get_button("unknown") is None
+
+    # The index follows the buttons added to and removed from the hub
+    mock_flichub_client.get_buttons.return_value = [hall]
+    await coordinator.async_refresh()
+
+    assert coordinator.async_get_button(hall.bdaddr) is hall
+    assert coordinator.async_get_button(kitchen.bdaddr) is None
+    assert coordinator.async_get_button(kitchen.serial_number) is None
+
+
+async def test_connection_events_patch_button_without_refresh(hass: HomeAssistant, mock_flichub_client):
+    """Test that connection events update the button in place instead of refreshing."""
+    button = FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                        active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                        flic_version=2, firmware_version=10, key="key-1", passive_mode=False)
+    mock_flichub_client.get_buttons.return_value = [button]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.get("binary_sensor.kitchen_connection").state == "on"
+    mock_flichub_client.get_buttons.reset_mock()
+
+    import sys
+    flichub_client_mock_class = sys.modules['custom_components.flichub'].FlicHubClient
+    on_event = flichub_client_mock_class.call_args.kwargs.get("event_callback")
+
+    coordinator = hass.data[DOMAIN].entries[config_entry.entry_id].coordinator
+    with patch.object(coordinator.store, "async_update_snapshot") as update_snapshot:
+        on_event(None, Event("buttonDisconnected", button=button.bdaddr))
+        await hass.async_block_till_done()
+
+        assert hass.states.get("binary_sensor.kitchen_connection").state == "unavailable"
+        mock_flichub_client.get_buttons.assert_not_called()
+        # A patched button is not snapshotted, the next refresh is
+        update_snapshot.assert_not_called()
+        await coordinator.async_refresh()
+        update_snapshot.assert_called_once()
+
+
+async def test_refresh_keeps_hub_info_when_hubinfo_fails(hass: HomeAssistant, mock_flichub_client):
+    """Test that a failing hub info request does not fail the whole refresh."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN].entries[config_entry.entry_id].coordinator
+    hub_info = coordinator.data[DATA_HUB]
+    mock_flichub_client.get_hubinfo.side_effect = AttributeError("'NoneType' object has no attribute 'data'")
+
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.data[DATA_HUB] is hub_info
+    assert coordinator.last_refresh_duration is not None
+
+
+async def test_refresh_fails_when_hub_is_unreachable(hass: HomeAssistant, mock_flichub_client):
+    """Test that the refresh fails and the buttons go unavailable when neither request makes it."""
+    button = FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                        active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                        flic_version=2, firmware_version=10, key="key-1", passive_mode=False)
+    mock_flichub_client.get_buttons.return_value = [button]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN].entries[config_entry.entry_id].coordinator
+    assert hass.states.get("binary_sensor.kitchen_connection").state == "on"
+
+    mock_flichub_client.get_buttons.side_effect = ConnectionError("Connection lost")
+    mock_flichub_client.get_hubinfo.side_effect = ConnectionError("Connection lost")
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert not coordinator.last_update_success
+    assert hass.states.get("binary_sensor.kitchen_connection").state == "unavailable"
+
+    # A disconnected hub is not polled at all
+    mock_flichub_client.get_buttons.side_effect = None
+    mock_flichub_client.get_hubinfo.side_effect = None
+    mock_flichub_client.get_buttons.reset_mock()
+    await mock_flichub_client.async_on_disconnected()
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    mock_flichub_client.get_buttons.assert_not_called()
+
+
+async def test_refresh_only_updates_entities_of_changed_fields(hass: HomeAssistant, mock_flichub_client):
+    """Test that a refresh only writes the state of entities whose button field changed."""
+    def make_button(battery_status):
+        return FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                          active_disconnect=False, connected=True, ready=True, battery_status=battery_status,
+                          uuid="uuid-1", flic_version=2, firmware_version=10, key="key-1", passive_mode=False)
+
+    mock_flichub_client.get_buttons.return_value = [make_button(90)]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN].entries[config_entry.entry_id].coordinator
+    written = []
+    with patch.object(FlicHubButtonEntity, "async_write_ha_state", autospec=True,
+                      side_effect=lambda entity: written.append(entity.unique_id)):
+        await coordinator.async_refresh()
+        assert written == []
+
+        mock_flichub_client.get_buttons.return_value = [make_button(50)]
+        await coordinator.async_refresh()
+        assert written == ["BA12-A34567-battery"]
+
+
+async def test_setup_from_snapshot_does_not_wait_for_hub(hass: HomeAssistant, hass_storage, mock_flichub_client):
+    """Test that entities are created from the stored snapshot while the hub is unreachable."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+    hass_storage[f"{DOMAIN}.{config_entry.entry_id}"] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": f"{DOMAIN}.{config_entry.entry_id}",
+        "data": {
+            "buttons": [{
+                "bdaddr": "90:88:a9:5b:12:89", "serial_number": "BA12-A34567", "color": "white", "name": "Kitchen",
+                "active_disconnect": False, "connected": True, "ready": True, "battery_status": 90,
+                "uuid": "uuid-1", "flic_version": 2, "firmware_version": 10, "key": "key-1",
+                "passive_mode": False, "battery_timestamp": "2026-01-01T10:00:00", "boot_id": ""
+            }],
+            "hub": {
+                "dhcp": {"wifi": {"connected": True, "ip": "192.168.1.64", "mac": "11:22:33:44:55:66"}},
+                "wifi_state": {"state": "connected", "ssid": [104, 111, 109, 101]}
+            }
+        }
+    }
+
+    # The hub never answers
+    mock_flichub_client.async_connect.side_effect = asyncio.Event().wait
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state == ConfigEntryState.LOADED
+    assert hass.states.get("sensor.kitchen_battery").state == "90"
+    mock_flichub_client.get_buttons.assert_not_called()
+
+
+async def test_click_runs_only_matching_device_triggers(hass: HomeAssistant, mock_flichub_client):
+    """Test that a click runs the device triggers of its button, click type and button number."""
+    button = FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                        active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                        flic_version=2, firmware_version=10, key="key-1", passive_mode=False)
+    mock_flichub_client.get_buttons.return_value = [button]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, button.serial_number)})
+    calls = async_mock_service(hass, "test", "automation")
+    assert await async_setup_component(hass, automation.DOMAIN, {
+        automation.DOMAIN: [
+            {
+                "trigger": {"platform": "device", "domain": DOMAIN, "device_id": device.id, "type": trigger_type},
+                "action": {"service": "test.automation", "data": {"trigger_type": trigger_type}},
+            }
+            for trigger_type in ("single", "double", "single_button_1")
+        ]
+    })
+
+    import sys
+    flichub_client_mock_class = sys.modules['custom_components.flichub'].FlicHubClient
+    on_event = flichub_client_mock_class.call_args.kwargs.get("event_callback")
+
+    on_event(button, Event("button", button=button.bdaddr, action="single", button_number=0))
+    await hass.async_block_till_done()
+
+    assert [call.data["trigger_type"] for call in calls] == ["single"]
+
+    on_event(button, Event("button", button=button.bdaddr, action="single", button_number=1))
+    await hass.async_block_till_done()
+
+    assert sorted(call.data["trigger_type"] for call in calls) == ["single", "single", "single_button_1"]
+
+
+async def test_poll_interval_backs_off_while_hub_pushes(hass: HomeAssistant, mock_flichub_client):
+    """Test that the poll interval stretches while pushes arrive and tightens without them."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN].entries[config_entry.entry_id].coordinator
+    coordinator.server_version = REQUIRED_SERVER_VERSION
+    assert coordinator.connected
+
+    coordinator.async_push_received()
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=2 * DEFAULT_SCAN_INTERVAL)
+
+    coordinator.async_push_received()
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=4 * DEFAULT_SCAN_INTERVAL)
+
+    # No push since the last poll
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+
+
+async def test_reconnect_resyncs_buttons(hass: HomeAssistant, mock_flichub_client, caplog):
+    """Test that a reconnect refreshes the buttons and adds those added while disconnected."""
+    def make_button(serial_number, bdaddr, name):
+        return FlicButton(bdaddr=bdaddr, serial_number=serial_number, color="white", name=name,
+                          active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                          flic_version=2, firmware_version=10, key="key-1", passive_mode=False)
+
+    kitchen = make_button("BA12-A34567", "90:88:a9:5b:12:89", "Kitchen")
+    mock_flichub_client.get_buttons.return_value = [kitchen]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN].entries[config_entry.entry_id].coordinator
+    await mock_flichub_client.async_on_disconnected()
+    assert not coordinator.connected
+
+    mock_flichub_client.get_buttons.return_value = [kitchen, make_button("BA12-B76543", "90:88:a9:5b:12:90", "Hall")]
+    mock_flichub_client.get_server_info.reset_mock()
+    await mock_flichub_client.async_on_connected()
+    await hass.async_block_till_done()
+
+    assert coordinator.connected
+    mock_flichub_client.get_server_info.assert_awaited_once()
+    assert hass.states.get("sensor.hall_battery").state == "90"
+
+    # A failed request during the resync is logged, the refresh still happens
+    mock_flichub_client.get_server_info.side_effect = asyncio.TimeoutError()
+    mock_flichub_client.get_buttons.reset_mock()
+    await mock_flichub_client.async_on_disconnected()
+    await mock_flichub_client.async_on_connected()
+    await hass.async_block_till_done()
+
+    assert "Failed to resync server info with Flic Hub: TimeoutError" in caplog.text
+    mock_flichub_client.get_buttons.assert_awaited_once()
+
+
+async def test_platform_options_apply_without_reconnect(hass: HomeAssistant, mock_flichub_client):
+    """Test that disabled platforms are not loaded and toggling them does not reconnect."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+        options={"cover": False},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    data_entry = hass.data[DOMAIN].entries[config_entry.entry_id]
+    assert "cover" not in data_entry.platforms
+    assert "light" in data_entry.platforms
+
+    hass.config_entries.async_update_entry(config_entry, options={"cover": True, "light": False})
+    await hass.async_block_till_done()
+
+    assert "cover" in data_entry.platforms
+    assert "light" not in data_entry.platforms
+    assert hass.data[DOMAIN].entries[config_entry.entry_id] is data_entry
+    # Only the discovery of the unloaded platform stops, cover and media player still add devices
+    dispatchers = hass.data[DATA_DISPATCHER]
+    assert len(dispatchers[f"{DOMAIN}_{config_entry.entry_id}_add_virtual_device"]) == 2
+    assert len(dispatchers[f"{DOMAIN}_{config_entry.entry_id}_add_button"]) == 2
+    mock_flichub_client.async_connect.assert_called_once()
+    mock_flichub_client.disconnect.assert_not_called()
+
+
+async def test_options_are_applied_live(hass: HomeAssistant, mock_flichub_client):
+    """Test that deadband and rate changes reach the running objects and only an address change reconnects."""
+    button = FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                        active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                        flic_version=3, firmware_version=10, key="key-1", passive_mode=False)
+    mock_flichub_client.get_buttons.return_value = [button]
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={
+            "ip_address": "192.168.1.64",
+            "port": "8124",
+            DATA_VIRTUAL_DEVICES: [
+                {"button_id": button.bdaddr, "virtual_device_id": "Virtual Light", "dimmable_type": "Light"},
+            ]
+        },
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    data_entry = hass.data[DOMAIN].entries[config_entry.entry_id]
+    hass.config_entries.async_update_entry(
+        config_entry, options={"deadband_enter": 7, "deadband_exit": 12, "max_update_rate": 4}
+    )
+    await hass.async_block_till_done()
+
+    controller = hass.data["light"].get_entity("light.kitchen_virtual_light")._brightness_controller
+    assert (controller.deadband_enter, controller.deadband_exit) == (7, 12)
+    assert data_entry.sender._interval == 0.25
+    mock_flichub_client.disconnect.assert_not_called()
+
+    hass.config_entries.async_update_entry(config_entry, data={**config_entry.data, "port": "8125"})
+    await hass.async_block_till_done()
+
+    mock_flichub_client.disconnect.assert_called_once()
+    assert hass.data[DOMAIN].entries[config_entry.entry_id] is not data_entry
+
+
+async def test_diagnostics_report_hub_metrics(hass: HomeAssistant, mock_flichub_client):
+    """Test that diagnostics contain the event counters and latencies of the hub."""
+    button = FlicButton(bdaddr="90:88:a9:5b:12:89", serial_number="BA12-A34567", color="white", name="Kitchen",
+                        active_disconnect=False, connected=True, ready=True, battery_status=90, uuid="uuid-1",
+                        flic_version=2, firmware_version=10, key="key-1", passive_mode=False)
+    mock_flichub_client.get_buttons.return_value = [button]
+    mock_flichub_client.reconnect_count = 2
+    mock_flichub_client.scheduler.stats = {"interactive": {"depth": 0}}
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    import sys
+    flichub_client_mock_class = sys.modules['custom_components.flichub'].FlicHubClient
+    on_event = flichub_client_mock_class.call_args.kwargs.get("event_callback")
+    on_event(button, Event("button", button=button.bdaddr, action="down"))
+    on_event(button, Event("button", button=button.bdaddr, action="up"))
+    on_event(None, Event("buttonReady", button=button.bdaddr))
+    await hass.async_block_till_done()
+
+    from custom_components.flichub.diagnostics import async_get_config_entry_diagnostics
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+
+    assert diagnostics["entry"]["data"]["ip_address"] == "**REDACTED**"
+    assert diagnostics["hub"]["reconnect_count"] == 2
+    assert diagnostics["metrics"]["events"] == {"button": 2, "buttonReady": 1}
+    assert diagnostics["metrics"]["click_latency_ms"]["count"] == 2
+    assert diagnostics["metrics"]["refresh_duration_ms"]["count"] == 1
+    assert diagnostics["outbound_queues"] == {"interactive": {"depth": 0}}
+
+
+async def test_failed_requests_in_background_are_handled(hass: HomeAssistant, mock_flichub_client, tmp_path):
+    """Test that requests which time out after a connect or when recording starts do not leak an exception."""
+    hass.config.config_dir = str(tmp_path)
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Flic Hub",
+        data={"ip_address": "192.168.1.64", "port": "8124"},
+    )
+    config_entry.add_to_hass(hass)
+
+    async def mock_connect(*args, **kwargs):
+        await mock_flichub_client.async_on_connected()
+    mock_flichub_client.async_connect.side_effect = mock_connect
+    mock_flichub_client.get_server_info.side_effect = asyncio.TimeoutError()
+    mock_flichub_client.recorder = None
+
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert config_entry.state == ConfigEntryState.LOADED
+
+    mock_flichub_client.get_buttons.side_effect = ConnectionError("Not connected")
+    await hass.services.async_call(DOMAIN, "start_recording", {}, blocking=True)
+    await hass.async_block_till_done()
+    mock_flichub_client.get_buttons.assert_called()
+    assert mock_flichub_client.recorder is not None
+
+    await hass.services.async_call(DOMAIN, "stop_recording", {}, blocking=True)
+    assert mock_flichub_client.recorder is None
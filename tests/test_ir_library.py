@@ -0,0 +1,33 @@
+from array import array
+from homeassistant.core import HomeAssistant
+
+from custom_components.flichub.ir_library import FlicHubIrLibrary, compile_signal, concatenate_signals
+
+
+def test_signals_are_concatenated_with_gaps():
+    """Test that the gap extends a trailing silence and follows a trailing pulse."""
+    first = compile_signal(38000, [9000, -4500, 560, -560])
+    second = compile_signal(38000, [560, -560, 560])
+    third = compile_signal(38000, [1000])
+
+    sequence = concatenate_signals([first, second, third], 100000)
+
+    assert isinstance(sequence, array)
+    assert sequence.tolist() == [38000, 9000, -4500, 560, -100560, 560, -560, 560, -100000, 1000]
+
+
+async def test_library_round_trips_through_storage(hass: HomeAssistant, hass_storage):
+    """Test that signals are stored compactly and restored by name and hash."""
+    library = FlicHubIrLibrary(hass)
+    await library.async_load()
+    key = library.async_add(compile_signal(38000, [9000, -4500]), "tv_power")
+    assert library.async_add(compile_signal(38000, [9000, -4500])) == key
+
+    stored = library._data_to_save()
+    assert stored["names"] == {"tv_power": key}
+    hass_storage["flichub.ir_library"] = {"version": 1, "minor_version": 1, "key": "flichub.ir_library", "data": stored}
+
+    restored = FlicHubIrLibrary(hass)
+    await restored.async_load()
+    assert restored.async_get("tv_power").tolist() == [38000, 9000, -4500]
+    assert restored.async_get(key) == restored.async_get("tv_power")
@@ -0,0 +1,134 @@
+import asyncio
+import pstats
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.flichub.const import DOMAIN
+from custom_components.flichub.profiler import FlicHubProfiler, outside_profile, profiled
+from tests.simulator import FlicHubSimulator, click_event, make_button
+
+
+def profiled_functions(path) -> set[str]:
+    return {function for _, _, function in pstats.Stats(str(path)).stats}
+
+
+def busy():
+    return sum(range(100))
+
+
+def unprofiled():
+    return busy()
+
+
+@profiled
+def inner():
+    return busy()
+
+
+@profiled
+def outer():
+    inner()
+    return unprofiled()
+
+
+def listener():
+    inner()
+    return busy()
+
+
+@profiled
+def fire():
+    with outside_profile():
+        return listener()
+
+
+async def other_work():
+    await asyncio.sleep(0)
+    unprofiled()
+
+
+@profiled
+async def refresh():
+    busy()
+    await asyncio.sleep(0.01)
+    return busy()
+
+
+async def test_profiler_only_runs_in_profiled_callbacks(tmp_path):
+    """Test that only profiled callbacks and what they call end up in the profile."""
+    outer()
+
+    profiler = FlicHubProfiler(str(tmp_path / "flichub.prof"))
+    profiler.start()
+    assert profiler.running
+    assert outer() == 4950
+    # Runs while refresh is awaiting
+    other = asyncio.create_task(other_work())
+    assert await refresh() == 4950
+    unprofiled()
+    await other
+    profiler.stop()
+    assert not profiler.running
+    outer()
+    profiler.write()
+
+    stats = pstats.Stats(profiler.path).stats
+    calls = {function: stat[1] for (_, _, function), stat in stats.items()}
+    assert calls["outer"] == 1
+    assert calls["inner"] == 1
+    # Every step of the coroutine counts as a call
+    assert "refresh" in calls
+    # Only the calls made inside profiled callbacks: unprofiled by outer, busy by inner, unprofiled and refresh
+    assert calls["unprofiled"] == 1
+    assert calls["busy"] == 4
+    assert "other_work" not in calls
+
+
+async def test_listeners_are_left_out_of_the_profile(tmp_path):
+    """Test that code run outside_profile is only profiled in the profiled callbacks it calls."""
+    profiler = FlicHubProfiler(str(tmp_path / "flichub.prof"))
+    profiler.start()
+    assert fire() == 4950
+    profiler.stop()
+    # Not profiling
+    with outside_profile():
+        busy()
+    profiler.write()
+
+    calls = {function: stat[1] for (_, _, function), stat in pstats.Stats(profiler.path).stats.items()}
+    assert calls["fire"] == 1
+    assert calls["inner"] == 1
+    # Called by inner only
+    assert calls["busy"] == 1
+    assert "listener" not in calls
+
+
+async def test_profile_service(hass: HomeAssistant, socket_enabled, tmp_path, setup_hub):
+    """Test that the profile service writes the profile of the hub callbacks into the config dir."""
+    hass.config.config_dir = str(tmp_path)
+    hub = FlicHubSimulator([make_button(0)])
+    await hub.start()
+    entry = await setup_hub(hub)
+    metrics = hass.data[DOMAIN].entries[entry.entry_id].coordinator.metrics
+
+    await hass.services.async_call(DOMAIN, "profile", {"duration": 10}, blocking=True)
+    hub.send(click_event(hub.buttons[0], "down"))
+    async with asyncio.timeout(5):
+        while not metrics.events.get("button"):
+            await asyncio.sleep(0.01)
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN].profiler is None
+
+    profiles = list(tmp_path.glob(f"{DOMAIN}_profile_*.prof"))
+    assert len(profiles) == 1
+    functions = await hass.async_add_executor_job(profiled_functions, profiles[0])
+    assert {"on_event", "_event_callback"} <= functions
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hub.stop()
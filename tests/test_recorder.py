@@ -0,0 +1,64 @@
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.flichub.const import DOMAIN
+from custom_components.flichub.recorder import read_recording
+from tests.simulator import FlicHubSimulator, buttons_from_recording, click_event, connection_event, \
+    make_button
+
+
+async def async_wait_for_events(hass: HomeAssistant, entry, count: int) -> None:
+    metrics = hass.data[DOMAIN].entries[entry.entry_id].coordinator.metrics
+    async with asyncio.timeout(5):
+        while sum(metrics.events.values()) < count:
+            await asyncio.sleep(0.01)
+    await hass.async_block_till_done()
+
+
+async def test_record_and_replay(hass: HomeAssistant, socket_enabled, tmp_path, setup_hub):
+    """Test that a recording of a hub replays into the same events on another instance."""
+    hass.config.config_dir = str(tmp_path)
+    hub = FlicHubSimulator([make_button(index) for index in range(2)])
+    await hub.start()
+    entry = await setup_hub(hub)
+
+    await hass.services.async_call(DOMAIN, "start_recording", {"duration": 30}, blocking=True)
+    await hass.async_block_till_done()
+    hub.send(click_event(hub.buttons[0], "down"))
+    await asyncio.sleep(0.05)
+    hub.send(connection_event(hub.buttons[1], False))
+    await async_wait_for_events(hass, entry, 2)
+    await hass.services.async_call(DOMAIN, "stop_recording", {}, blocking=True)
+    # Not recorded any more
+    hub.send(click_event(hub.buttons[0], "up"))
+    await async_wait_for_events(hass, entry, 3)
+
+    recordings = list(tmp_path.glob(f"{DOMAIN}_{entry.entry_id}_*.jsonl.gz"))
+    assert len(recordings) == 1
+    records = await hass.async_add_executor_job(read_recording, str(recordings[0]))
+    assert [message.get("event", message.get("command")) for _, message in records] == [
+        "buttons", "button", "buttonDisconnected"
+    ]
+    assert records[2][0] - records[1][0] >= 0.05
+    assert buttons_from_recording(records) == hub.buttons
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hub.stop()
+
+    # Replay into a fresh hub
+    replay_hub = FlicHubSimulator(buttons_from_recording(records))
+    await replay_hub.start()
+    replay_entry = await setup_hub(replay_hub)
+    assert hass.states.get("binary_sensor.button_0").state == "off"
+    assert hass.states.get("binary_sensor.button_1_connection").state == "on"
+    await replay_hub.replay_recording(records)
+    await async_wait_for_events(hass, replay_entry, 2)
+
+    metrics = hass.data[DOMAIN].entries[replay_entry.entry_id].coordinator.metrics
+    assert metrics.events == {"button": 1, "buttonDisconnected": 1}
+    assert hass.states.get("binary_sensor.button_0").state == "on"
+    assert hass.states.get("binary_sensor.button_1_connection").state == "unavailable"
+
+    await hass.config_entries.async_unload(replay_entry.entry_id)
+    await replay_hub.stop()
@@ -0,0 +1,51 @@
+import asyncio
+import json
+from unittest.mock import MagicMock
+from homeassistant.core import HomeAssistant
+
+from custom_components.flichub.const import PRIORITY_INTERACTIVE, PRIORITY_IR, PRIORITY_POLL, QUEUE_SIZES
+from custom_components.flichub.scheduler import FlicHubCommandScheduler
+
+
+async def test_commands_are_written_by_priority_and_merged(hass: HomeAssistant):
+    """Test that queued commands go out highest priority first with virtual device values merged."""
+    write = MagicMock()
+    scheduler = FlicHubCommandScheduler(hass.loop, write)
+    scheduler.pause()
+
+    scheduler.submit(PRIORITY_POLL, "buttons", key="buttons")
+    scheduler.submit(PRIORITY_IR, {"command": "play_ir", "signal_id": 1})
+    scheduler.submit(PRIORITY_INTERACTIVE, {"command": "virtualDeviceUpdateState", "values": {"hue": 0.5}},
+                     key=("Light", "Virtual Light"))
+    scheduler.submit(PRIORITY_INTERACTIVE, {"command": "virtualDeviceUpdateState", "values": {"brightness": 0.3}},
+                     key=("Light", "Virtual Light"))
+    assert scheduler.stats[PRIORITY_INTERACTIVE]["depth"] == 1
+    write.assert_not_called()
+
+    scheduler.resume()
+
+    assert [args.args[0] for args in write.call_args_list] == [
+        json.dumps({"command": "virtualDeviceUpdateState", "values": {"hue": 0.5, "brightness": 0.3}}),
+        json.dumps({"command": "play_ir", "signal_id": 1}),
+        "buttons",
+    ]
+    assert scheduler.stats[PRIORITY_INTERACTIVE]["merged"] == 1
+
+
+async def test_ir_is_paced_and_bounded(hass: HomeAssistant):
+    """Test that held IR does not hold back interactive commands and that overflowing IR is dropped."""
+    write = MagicMock()
+    scheduler = FlicHubCommandScheduler(hass.loop, write)
+
+    for signal_id in range(QUEUE_SIZES[PRIORITY_IR] + 2):
+        scheduler.submit(PRIORITY_IR, {"command": "play_ir", "signal_id": signal_id}, hold=0.01)
+    assert write.call_count == 1
+    assert scheduler.stats[PRIORITY_IR]["dropped"] == 1
+
+    scheduler.submit(PRIORITY_INTERACTIVE, {"command": "virtualDeviceUpdateState", "values": {}})
+    assert write.call_count == 2
+
+    await asyncio.sleep(0.05)
+    assert 2 < write.call_count < QUEUE_SIZES[PRIORITY_IR] + 1
+    assert scheduler.stats[PRIORITY_IR]["max_wait"] > 0
+    scheduler.clear()
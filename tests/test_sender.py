@@ -0,0 +1,42 @@
+import asyncio
+from unittest.mock import MagicMock, call
+from homeassistant.core import HomeAssistant
+
+from custom_components.flichub.sender import FlicHubVirtualDeviceSender
+
+
+async def test_updates_are_coalesced_and_latest_value_is_sent(hass: HomeAssistant):
+    """Test that updates within the interval are merged and the final value is delivered."""
+    client = MagicMock()
+    sender = FlicHubVirtualDeviceSender(hass, client, max_rate=20)
+
+    sender.async_send("Light", "Virtual Light", {"brightness": 0.1})
+    sender.async_send("Light", "Virtual Light", {"brightness": 0.2, "hue": 0.5})
+    sender.async_send("Light", "Virtual Light", {"brightness": 0.3})
+    sender.async_send("Blind", "Virtual Blind", {"position": 0.4})
+
+    assert client.send_virtual_device_update_state.call_args_list == [
+        call("Light", "Virtual Light", {"brightness": 0.1}),
+        call("Blind", "Virtual Blind", {"position": 0.4}),
+    ]
+
+    await asyncio.sleep(0.1)
+
+    assert client.send_virtual_device_update_state.call_count == 3
+    assert client.send_virtual_device_update_state.call_args == call(
+        "Light", "Virtual Light", {"brightness": 0.3, "hue": 0.5}
+    )
+
+
+async def test_shutdown_flushes_pending_updates(hass: HomeAssistant):
+    """Test that pending updates are sent on shutdown."""
+    client = MagicMock()
+    sender = FlicHubVirtualDeviceSender(hass, client, max_rate=1)
+
+    sender.async_send("Speaker", "Virtual Speaker", {"volume": 0.1})
+    sender.async_send("Speaker", "Virtual Speaker", {"volume": 0.7})
+    sender.async_shutdown()
+
+    assert client.send_virtual_device_update_state.call_args == call(
+        "Speaker", "Virtual Speaker", {"volume": 0.7}
+    )
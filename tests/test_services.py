@@ -0,0 +1,104 @@
+import pytest
+import voluptuous as vol
+from unittest.mock import AsyncMock, MagicMock, patch
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import device_registry as dr
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.flichub.const import DOMAIN
+from pyflichub.button import FlicButton
+from pyflichub.flichub import FlicHubInfo
+
+
+def make_client(serial_number, ip_address, mac_address):
+    client = MagicMock()
+
+    async def mock_connect(*args, **kwargs):
+        await client.async_on_connected()
+
+    client.async_connect = AsyncMock(side_effect=mock_connect)
+    client.get_server_info = AsyncMock()
+    client.get_buttons = AsyncMock(return_value=[
+        FlicButton(bdaddr=f"bdaddr-{serial_number}", serial_number=serial_number, color="white",
+                   name=serial_number, active_disconnect=False, connected=True, ready=True, battery_status=90,
+                   uuid="uuid-1", flic_version=2, firmware_version=10, key="key-1", passive_mode=False)
+    ])
+    client.get_hubinfo = AsyncMock(return_value=FlicHubInfo(
+        dhcp={"wifi": {"connected": True, "ip": ip_address, "mac": mac_address}},
+        wifi_state={"state": "connected", "ssid": [ord(char) for char in "home"]}
+    ))
+    return client
+
+
+async def test_services_fan_out_to_targeted_hubs(hass: HomeAssistant):
+    """Test that one service call reaches every targeted hub and only those."""
+    clients = [
+        make_client("BA12-A34567", "192.168.1.0", "11:22:33:44:55:00"),
+        make_client("BA12-B76543", "192.168.1.1", "11:22:33:44:55:01")
+    ]
+    entries = [
+        MockConfigEntry(domain=DOMAIN, title=f"Flic Hub {i}", data={"ip_address": f"192.168.1.{i}", "port": "8124"})
+        for i in range(2)
+    ]
+    with patch("custom_components.flichub.FlicHubClient", side_effect=clients):
+        for entry in entries:
+            entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+
+    # Services are registered once for the domain
+    assert hass.services.has_service(DOMAIN, "play_ir")
+
+    # With more than one hub the target is required
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(DOMAIN, "play_ir", {"signal_id": "2"}, blocking=True)
+    for client in clients:
+        client.play_ir.assert_not_called()
+
+    await hass.services.async_call(DOMAIN, "play_ir", {
+        "signal_id": "2", "config_entry_id": [entry.entry_id for entry in entries]
+    }, blocking=True)
+    for client in clients:
+        client.play_ir.assert_called_once_with(2)
+
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "BA12-B76543")})
+    await hass.services.async_call(DOMAIN, "play_ir", {"signal_id": 3, "device_id": device.id}, blocking=True)
+    assert clients[0].play_ir.call_count == 1
+    clients[1].play_ir.assert_called_with(3)
+
+    await hass.services.async_call(DOMAIN, "send_virtual_device_update_state", {
+        "config_entry_id": entries[0].entry_id,
+        "dimmable_type": "Light",
+        "virtual_device_id": "Virtual Light",
+        "values": {"brightness": 0.5}
+    }, blocking=True)
+    clients[0].send_virtual_device_update_state.assert_called_once_with(
+        "Light", "Virtual Light", {"brightness": 0.5}
+    )
+    clients[1].send_virtual_device_update_state.assert_not_called()
+
+
+async def test_play_ir_sequence_sends_one_request(hass: HomeAssistant):
+    """Test that a sequence of stored signals is played with one raw IR request."""
+    client = make_client("BA12-A34567", "192.168.1.0", "11:22:33:44:55:00")
+    entry = MockConfigEntry(domain=DOMAIN, title="Flic Hub", data={"ip_address": "192.168.1.0", "port": "8124"})
+    entry.add_to_hass(hass)
+    with patch("custom_components.flichub.FlicHubClient", return_value=client):
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    await hass.services.async_call(DOMAIN, "save_ir_signal", {"name": "tv_1", "signal": [38000, 560, -560]},
+                                   blocking=True)
+    await hass.services.async_call(DOMAIN, "save_ir_signal", {"name": "tv_2", "signal": [38000, 560, -1690]},
+                                   blocking=True)
+    # A single hub is targeted implicitly
+    await hass.services.async_call(DOMAIN, "play_ir_sequence", {"signals": ["tv_1", "tv_2", "tv_1"], "gap": 50},
+                                   blocking=True)
+
+    client.play_ir_raw.assert_called_once_with([38000, 560, -50560, 560, -51690, 560, -560])
+
+    # The gap is limited like in the UI
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(DOMAIN, "play_ir_sequence", {"signals": ["tv_1"], "gap": 5001}, blocking=True)
+    assert client.play_ir_raw.call_count == 1
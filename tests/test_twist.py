@@ -0,0 +1,97 @@
+import asyncio
+from homeassistant.core import HomeAssistant
+
+from custom_components.flichub.metrics import Histogram
+from custom_components.flichub.twist import FlicHubTwistController, FlicHubTwistEngine
+
+
+async def test_engine_ticks_only_active_controllers(hass: HomeAssistant):
+    """Test that moving controllers share one timer and idle controllers are released."""
+    engine = FlicHubTwistEngine(hass, interval=0.01)
+    changes = []
+    latency = Histogram()
+    twist = FlicHubTwistController(engine, cfg={"initialOutPct": 50}, on_change_callback=changes.append,
+                                   latency=latency)
+    idle = FlicHubTwistController(engine, cfg={"initialOutPct": 50})
+
+    twist.update_raw(50)
+    twist.update_raw(80)
+    assert engine.stats["active_controllers"] == 1
+    assert twist.active
+    assert not idle.active
+
+    await asyncio.sleep(0.05)
+    assert changes and changes == sorted(changes)
+    assert changes[0] > 50
+    # Only the first change after a raw value counts, and it waits for a tick
+    assert latency.count == 1
+    assert latency.max >= 5
+
+    # Back in the deadband, released on the next tick
+    twist.update_raw(50)
+    await asyncio.sleep(0.03)
+    assert engine.stats["active_controllers"] == 0
+    assert not twist.active
+    assert engine._timer is None
+    assert engine.stats["ticks"] >= 1
+
+    twist.stop()
+
+
+async def test_controller_steps_by_speed_tier_and_times_out(hass: HomeAssistant):
+    """Test the detent steps of the local controller, neutral hysteresis and the release on timeout."""
+    engine = FlicHubTwistEngine(hass, interval=0.01)
+    changes = []
+    twist = FlicHubTwistController(
+        engine, cfg={"initialOutPct": 50, "deadbandEnter": 2, "deadbandExit": 5, "timeoutMs": 0},
+        on_change_callback=changes.append
+    )
+
+    assert twist.update_raw("not a number") is None
+    assert twist.update_raw(20)["note"] == "deadband (enter)"
+    # Inside the exit deadband the neutral sticks
+    assert twist.update_raw(24)["speed"] == 0
+    intent = twist.update_raw(90)
+    assert (intent["dir"], intent["speed"]) == (1, 3)
+    twist.tick()
+    twist.tick()
+    assert changes == [53, 56]
+
+    intent = twist.update_raw(5)
+    assert (intent["dir"], intent["speed"], intent["fineMode"]) == (-1, 1, True)
+    twist.tick()
+    assert changes[-1] == 55
+
+    # No raw values within the timeout, back to neutral
+    twist.timeout_ms = 1
+    await asyncio.sleep(0.005)
+    twist.tick()
+    assert not twist.moving
+    assert twist.stop() == 55
+    assert not twist.active
+
+
+async def test_latency_does_not_count_idle_time(hass: HomeAssistant):
+    """Test that raw values in the deadband or before a release do not start the latency of the next move."""
+    engine = FlicHubTwistEngine(hass, interval=0.01)
+    latency = Histogram()
+    twist = FlicHubTwistController(engine, cfg={"initialOutPct": 50}, latency=latency)
+
+    twist.update_raw(50)
+    twist.update_raw(52)
+    await asyncio.sleep(0.2)
+    twist.update_raw(80)
+    twist.tick()
+    assert latency.count == 1
+    assert latency.max < 100
+
+    # Let go and idle until released
+    twist.update_raw(50)
+    await asyncio.sleep(0.2)
+    assert not twist.active
+    twist.update_raw(80)
+    twist.tick()
+    assert latency.count == 2
+    assert latency.max < 100
+
+    twist.stop()